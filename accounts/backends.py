@@ -1,29 +1,37 @@
 # accounts/backends.py
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.functions import Lower
 
 UserModel = get_user_model()
 
 class EmailOrUsernameBackend(ModelBackend):
     """
-    username 引数に渡された値をまず username として探し、
-    見つからなければ email として探して認証するバックエンド。
+    username 引数に渡された値を username または email（大文字小文字は区別しない）として
+    1 本のクエリで探して認証するバックエンド。
+    email は Member の大文字小文字を区別しない一意インデックスで引く。
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
         if username is None or password is None:
             return None
-        # まず username で試す
-        try:
-            user = UserModel.objects.get(username=username)
-        except UserModel.DoesNotExist:
-            user = None
 
-        # username で見つからなければ email で探す
+        # email 側は accounts_member_email_ci_uniq と同じ式（lower(email)・未入力除外）で比べる
+        candidates = list(
+            UserModel._default_manager.alias(email_lower=Lower("email"))
+            .filter(Q(username=username) | (Q(email_lower=username.lower()) & ~Q(email="")))[:2]
+        )
+        # 別の会員の email と同じ文字列の username があれば username を優先
+        user = next((u for u in candidates if u.username == username), None)
+        if user is None and candidates:
+            user = candidates[0]
+
         if user is None:
-            try:
-                user = UserModel.objects.get(email=username)
-            except UserModel.DoesNotExist:
-                return None
+            # 見つからなくてもハッシュ計算は 1 回して、応答時間で会員の有無が分からないようにする
+            UserModel().set_password(password)
+            return None
 
         # パスワード確認
         if user.check_password(password) and self.user_can_authenticate(user):
@@ -0,0 +1,65 @@
+# coding: utf-8
+import csv
+import io
+import re
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import PostalCode
+from accounts.postal import clear_cache
+
+# 町域として使わない表記
+NO_TOWN = ("以下に掲載がない場合",)
+NO_TOWN_SUFFIX = ("の次に番地がくる場合", "の次に番地がくる場合）")
+
+
+def _town(value: str) -> str:
+    if value in NO_TOWN or value.endswith(NO_TOWN_SUFFIX):
+        return ""
+    # 「（次のビルを除く）」「（１〜１９丁目）」などの注記は落とす（複数行に分かれるものも先頭行で切れる）
+    return re.split(r"[（(]", value, maxsplit=1)[0]
+
+
+class Command(BaseCommand):
+    help = "日本郵便の郵便番号データ（KEN_ALL.CSV / .zip）を PostalCode に読み込む（入れ替え）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="KEN_ALL.CSV か ken_all.zip のパス")
+        parser.add_argument("--encoding", default="cp932", help="CSV の文字コード（utf_ken_all は utf-8）")
+
+    def _rows(self, path, encoding):
+        if path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as zf:
+                names = [n for n in zf.namelist() if n.lower().endswith(".csv")]
+                if not names:
+                    raise CommandError("zip の中に CSV がありません")
+                with zf.open(names[0]) as f:
+                    yield from csv.reader(io.TextIOWrapper(f, encoding=encoding))
+        else:
+            with open(path, encoding=encoding, newline="") as f:
+                yield from csv.reader(f)
+
+    def handle(self, *args, **options):
+        # 郵便番号 -> (都道府県+市区町村, {町域})
+        entries = {}
+        try:
+            for row in self._rows(options["path"], options["encoding"]):
+                code, pref, city, town = row[2], row[6], row[7], _town(row[8])
+                base, towns = entries.setdefault(code, (pref + city, set()))
+                towns.add(town)
+        except (OSError, UnicodeDecodeError, IndexError) as e:
+            raise CommandError(f"読み込めませんでした: {e}")
+
+        # 1 つの番号に複数の町域があるときは市区町村まで
+        objs = [
+            PostalCode(code=code, address=base + (next(iter(towns)) if len(towns) == 1 else ""))
+            for code, (base, towns) in entries.items()
+        ]
+        with transaction.atomic():
+            PostalCode.objects.all().delete()
+            PostalCode.objects.bulk_create(objs, batch_size=5000)
+        clear_cache()
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(objs)} postal codes"))
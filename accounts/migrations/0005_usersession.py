@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_member_zoo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('session_key', models.CharField(max_length=40, primary_key=True, serialize=False, verbose_name='session key')),
+                ('session_data', models.TextField(verbose_name='session data')),
+                ('expire_date', models.DateTimeField(db_index=True, verbose_name='expire date')),
+                ('user_id', models.BigIntegerField(db_index=True, null=True, verbose_name='会員ID')),
+            ],
+            options={
+                'verbose_name': 'セッション',
+                'verbose_name_plural': 'セッション',
+            },
+        ),
+    ]
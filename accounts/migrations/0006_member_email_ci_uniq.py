@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:17
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_usersession'),
+        ('animals', '0006_animal_rank_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='member',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='accounts_member_email_ci_uniq', violation_error_message='このメールアドレスは既に登録されています。'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_member_email_ci_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostalCode',
+            fields=[
+                ('code', models.CharField(max_length=7, primary_key=True, serialize=False, verbose_name='郵便番号')),
+                ('address', models.CharField(max_length=255, verbose_name='住所')),
+            ],
+            options={
+                'verbose_name': '郵便番号',
+                'verbose_name_plural': '郵便番号',
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.sessions.base_session import AbstractBaseSession
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from animals.models import Zoo
 
 class Member(AbstractUser):
@@ -23,6 +26,45 @@ class Member(AbstractUser):
     class Meta:
         verbose_name = "会員"
         verbose_name_plural = "会員"
+        constraints = [
+            # ログイン時の email__iexact をこのインデックスで引く（未入力は対象外）
+            models.UniqueConstraint(
+                Lower("email"),
+                name="accounts_member_email_ci_uniq",
+                condition=~Q(email=""),
+                violation_error_message="このメールアドレスは既に登録されています。",
+            ),
+        ]
 
     def __str__(self):
         return self.username
+
+
+class PostalCode(models.Model):
+    """郵便番号 → 住所（load_postal_codes コマンドで日本郵便の KEN_ALL から作る）"""
+    code    = models.CharField("郵便番号", max_length=7, primary_key=True)
+    address = models.CharField("住所", max_length=255)
+
+    class Meta:
+        verbose_name = "郵便番号"
+        verbose_name_plural = "郵便番号"
+
+    def __str__(self):
+        return f"{self.code} {self.address}"
+
+
+class UserSession(AbstractBaseSession):
+    """
+    セッション（SESSION_ENGINE = "accounts.sessions"）。
+    ログイン中の会員の id を列に持たせ、会員ごとのセッションを索引で引けるようにする。
+    """
+    user_id = models.BigIntegerField("会員ID", null=True, db_index=True)
+
+    class Meta:
+        verbose_name = "セッション"
+        verbose_name_plural = "セッション"
+
+    @classmethod
+    def get_session_store_class(cls):
+        from .sessions import SessionStore
+        return SessionStore
@@ -0,0 +1,125 @@
+"""
+郵便番号 → 住所の引き当て。
+
+まず PostalCode テーブル（主キーが 7 桁の郵便番号）を引き、見つかった住所はプロセス内の LRU に置く
+（見つからなかった番号は置かない。load_postal_codes で足した番号は動いているワーカーでもすぐ引ける）。
+テーブルに無い番号だけ、POSTAL_FALLBACK_URL（既定は zipcloud）にタイムアウト付きで問い合わせる。
+問い合わせの結果は Django キャッシュに置き、同じ番号で何度も外に出ないようにする。
+async のビューからは alookup_address を使う（外部への問い合わせはイベントループの外で行う）。
+"""
+import logging
+import threading
+from functools import lru_cache
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PostalCode
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_KEY = "accounts:postal:{}"
+
+# 外部 API への接続はスレッドごとに使い回す（alookup_address は任意のスレッドから _fetch を呼ぶので、
+# requests.Session を 1 つだけ共有はしない）
+_local_http = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local_http, "session", None)
+    if session is None:
+        session = _local_http.session = requests.Session()
+    return session
+
+
+def normalize(code) -> str:
+    """ハイフン・空白を除いた 7 桁。形式が違えば空文字"""
+    code = str(code or "").replace("-", "").replace("ー", "").strip()
+    return code if len(code) == 7 and code.isascii() and code.isdigit() else ""
+
+
+class _NotFound(Exception):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def _local_hit(code: str) -> str:
+    address = PostalCode.objects.filter(code=code).values_list("address", flat=True).first()
+    if address is None:
+        # lru_cache は例外を覚えないので、見つからなかった番号は次も DB を引く
+        raise _NotFound(code)
+    return address
+
+
+def _local(code: str):
+    """PostalCode の住所。無ければ None"""
+    try:
+        return _local_hit(code)
+    except _NotFound:
+        return None
+
+
+def _fetch(code: str):
+    """外部 API に問い合わせる。失敗・該当なしは None"""
+    url = getattr(settings, "POSTAL_FALLBACK_URL", "")
+    if not url:
+        return None
+    try:
+        res = _session().get(url, params={"zipcode": code}, timeout=getattr(settings, "POSTAL_FALLBACK_TIMEOUT", 2))
+        res.raise_for_status()
+        results = res.json().get("results") or []
+    except (requests.RequestException, ValueError):
+        logger.warning("郵便番号の問い合わせに失敗しました: %s", code, exc_info=True)
+        return None
+    if not results:
+        return ""
+    addr = results[0]
+    return f"{addr['address1']}{addr['address2']}{addr['address3']}"
+
+
+def lookup_address(code) -> str:
+    """郵便番号の住所。見つからなければ空文字"""
+    code = normalize(code)
+    if not code:
+        return ""
+
+    address = _local(code)
+    if address is not None:
+        return address
+
+    key = FALLBACK_KEY.format(code)
+    address = cache.get(key)
+    if address is None:
+        address = _fetch(code)
+        if address is None:
+            # 通信の失敗はキャッシュしない
+            return ""
+        cache.set(key, address, getattr(settings, "POSTAL_FALLBACK_CACHE_TTL", 60 * 60 * 24))
+    return address
+
+
+async def alookup_address(code) -> str:
+    """lookup_address の async 版"""
+    code = normalize(code)
+    if not code:
+        return ""
+
+    address = await sync_to_async(_local)(code)
+    if address is not None:
+        return address
+
+    key = FALLBACK_KEY.format(code)
+    address = await cache.aget(key)
+    if address is None:
+        # DB に触らないので、スレッドプールで並行に待てる
+        address = await sync_to_async(_fetch, thread_sensitive=False)(code)
+        if address is None:
+            return ""
+        await cache.aset(key, address, getattr(settings, "POSTAL_FALLBACK_CACHE_TTL", 60 * 60 * 24))
+    return address
+
+
+def clear_cache():
+    _local_hit.cache_clear()
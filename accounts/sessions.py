@@ -0,0 +1,58 @@
+"""
+セッションエンジン（cached_db + 会員ごとの索引）。
+
+中身はキャッシュから読み、DB は UserSession に書く。保存のたびに
+ログイン中の会員 id を user_id 列に入れるので、ログイン（キーの付け替え）・
+ログアウト（削除）で会員 → セッションの対応が自然に最新になる。
+退会などで会員のセッションをまとめて消すときは revoke_user_sessions を使う。
+
+SESSION_CACHE_ALIAS のキャッシュがプロセスごと（LocMemCache など）だと、消したセッションが
+ほかのワーカーのキャッシュに残ってしまうので、その場合はキャッシュを使わず DB だけで読み書きする。
+"""
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX, SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.conf import settings
+
+from common.cache import cache_is_shared
+
+
+class UserIndexMixin:
+    @classmethod
+    def get_model_class(cls):
+        from .models import UserSession
+        return UserSession
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        try:
+            obj.user_id = int(data.get(SESSION_KEY))
+        except (TypeError, ValueError):
+            obj.user_id = None
+        return obj
+
+
+class CachedUserSessionStore(UserIndexMixin, CachedDBStore):
+    pass
+
+
+class DBUserSessionStore(UserIndexMixin, DBStore):
+    pass
+
+
+SessionStore = CachedUserSessionStore if cache_is_shared(settings.SESSION_CACHE_ALIAS) else DBUserSessionStore
+
+
+def revoke_user_sessions(user_id: int) -> int:
+    """会員のセッションをすべて消し、消した数を返す（その会員の件数分しか触らない）"""
+    from .models import UserSession
+
+    sessions = UserSession.objects.filter(user_id=user_id)
+    keys = list(sessions.values_list("session_key", flat=True))
+    if not keys:
+        return 0
+    if SessionStore is CachedUserSessionStore:
+        caches[settings.SESSION_CACHE_ALIAS].delete_many([KEY_PREFIX + key for key in keys])
+    sessions.filter(session_key__in=keys).delete()
+    return len(keys)
@@ -17,6 +17,5 @@ STATICFILES_DIRS = [
 AUTH_USER_MODEL = "accounts.Member"
 # settings.py の適切な場所に追加
 AUTHENTICATION_BACKENDS = [
-    'accounts.backends.EmailOrUsernameBackend',  # 先にカスタムバックエンド
-    'django.contrib.auth.backends.ModelBackend', # フォールバック（標準）
+    'accounts.backends.EmailOrUsernameBackend',  # ID / メールどちらでも（ModelBackend を継承しているのでフォールバックは不要）
 ]
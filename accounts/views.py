@@ -8,7 +8,7 @@ from .forms import MemberUpdateForm
 from django.views import View
 from datetime import date
 from django.http import JsonResponse
-import requests
+from .postal import alookup_address
 
 
 def login_view(request):
@@ -51,7 +51,7 @@ def signup_view(request):
             messages.error(request, "このユーザーIDはすでに登録されています。")
             return redirect("accounts:signup")
 
-        if Member.objects.filter(email=email).exists():
+        if Member.objects.filter(email__iexact=email).exists():
             messages.error(request, "このメールアドレスはすでに登録されています。")
             return redirect("accounts:signup")
 
@@ -124,26 +124,12 @@ class MemberEditConfirmView(View):
             return redirect('accounts:mypage')  # 保存後の遷移先
         return redirect('accounts:edit_profile')  # 修正
 
-def ajax_get_address(request):
+async def ajax_get_address(request):
     # ハイフンなしの郵便番号だけを取得
     postal_code = request.GET.get('postal_code', '').strip()
     
     if not postal_code.isdigit() or len(postal_code) != 7:
         return JsonResponse({'address': None})
     
-    # zipcloud API にリクエスト
-    url = f"http://zipcloud.ibsnet.co.jp/api/search?zipcode={postal_code}"
-    try:
-        res = requests.get(url)
-        res.raise_for_status()
-        result = res.json()
-        
-        if result['results']:
-            # 住所を結合して返す
-            addr_data = result['results'][0]
-            address = f"{addr_data['address1']}{addr_data['address2']}{addr_data['address3']}"
-            return JsonResponse({'address': address})
-        else:
-            return JsonResponse({'address': ''})
-    except Exception:
-        return JsonResponse({'address': ''})
+    # 手元の郵便番号データ（無い番号だけ外部 API）から引く
+    return JsonResponse({'address': await alookup_address(postal_code)})
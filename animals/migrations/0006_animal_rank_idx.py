@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0005_animal_diet_animal_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['is_active', '-total_point', 'animal_id'], name='animals_rank_idx'),
+        ),
+    ]
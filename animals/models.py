@@ -54,6 +54,10 @@ class Animal(models.Model):
         db_table = "animals"
         verbose_name = "Animal"
         verbose_name_plural = "Animals"
+        indexes = [
+            # ランキングのスナップショットを作る並び（total_point DESC, animal_id ASC）
+            models.Index(fields=["is_active", "-total_point", "animal_id"], name="animals_rank_idx"),
+        ]
 
     def __str__(self):
         zoo_name = self.zoo.zoo_name if self.zoo else "（所属なし）"
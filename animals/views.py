@@ -1,6 +1,11 @@
 from django.shortcuts import get_object_or_404, render
+from ranking import service as ranking_service
 from .models import Animal
 
 def detail(request, pk: int):
     animal = get_object_or_404(Animal, pk=pk)
-    return render(request, "animals/detail.html", {"animal": animal})
\ No newline at end of file
+    return render(request, "animals/detail.html", {
+        "animal": animal,
+        "rank": ranking_service.rank_of(animal.pk),
+        "neighbours": ranking_service.around(animal.pk, 2),
+    })
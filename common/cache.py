@@ -0,0 +1,17 @@
+"""
+キャッシュの共有範囲。
+
+既定の CACHES は LocMemCache（プロセスごと）なので、あるワーカーで消したキーは
+ほかのワーカーには残る。消して整合を取るキャッシュは cache_is_shared() のときだけ使う。
+"""
+from django.conf import settings
+
+# ワーカー間で共有されないキャッシュ
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_shared(alias: str = "default") -> bool:
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_CACHES
@@ -1,11 +1,10 @@
 from django.conf import settings
-from money.models import Wallet
+from money.service import lazy_wallet
  
 def navbar(request):
     if request.user.is_authenticated:
-        wallet = Wallet.objects.filter(member=request.user).first()
         return {
             "user": request.user,
-            "wallet": wallet,
+            "wallet": lazy_wallet(request),
         }
-    return {}
\ No newline at end of file
+    return {}
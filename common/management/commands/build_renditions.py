@@ -0,0 +1,23 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+
+from common.renditions import generate_all, image_fields, sizes
+
+
+class Command(BaseCommand):
+    help = "既存の画像から縮小版（レンディション）を作る（作成済みは飛ばす。--force で作り直す）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="作成済みのものも作り直す")
+
+    def handle(self, *args, **options):
+        force = options["force"]
+        total = 0
+        for model, fields in image_fields():
+            for values in model.objects.values_list("pk", *fields).iterator():
+                pk = values[0]
+                obj = model(pk=pk, **dict(zip(fields, values[1:])))
+                for name in fields:
+                    total += len(generate_all(getattr(obj, name), force=force))
+            self.stdout.write(f"{model._meta.label}: done")
+        self.stdout.write(self.style.SUCCESS(f"{total} renditions ready ({', '.join(sizes())})"))
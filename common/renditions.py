@@ -0,0 +1,128 @@
+"""
+画像のリサイズ版（レンディション）。
+
+アップロードされた元画像（Animal.pic1〜pic5 / Goods.image / GoodsImage.image）から
+表示サイズごとの縮小版を作り、MEDIA_ROOT/renditions/ 以下に置く。
+ファイル名は元画像のパスとサイズ名から決まるので、同じ画像なら何度作っても同じ場所になる。
+
+    animal_images/panda.jpg  →  renditions/animal_images/panda.card.webp
+
+保存時（common/signals.py）にバックグラウンドのスレッドで作る。テンプレートの |rendition フィルタは
+ファイルがあるか見るだけで、まだ無ければ元画像の URL を返す（リクエストの中では作らない）。
+既存の画像は build_renditions コマンドで作る・作り直す。
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+from .storage import save_overwrite
+
+logger = logging.getLogger(__name__)
+
+# サイズ名 -> 収める枠（幅, 高さ）。縦横比は保ち、元より大きくはしない
+DEFAULT_SIZES = {
+    "thumb": (240, 240),    # フッターのスクローラー・サイドバー・管理画面の一覧
+    "card": (640, 640),     # トップ・ランキング・グッズ一覧のカード
+    "large": (1280, 1280),  # 詳細ページ
+}
+
+RENDITION_DIR = "renditions"
+
+# 保存時の作成用（1 本ずつ順に作る。リクエストの応答は待たせない）
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="renditions")
+
+
+def sizes() -> dict:
+    return getattr(settings, "RENDITION_SIZES", DEFAULT_SIZES)
+
+
+def image_format() -> str:
+    """"webp"（既定）か "jpeg"。Pillow が WebP を書けなければ JPEG にする"""
+    fmt = getattr(settings, "RENDITION_FORMAT", "webp").lower()
+    if fmt == "webp" and not features.check("webp"):
+        fmt = "jpeg"
+    return fmt
+
+
+def rendition_name(name: str, size: str) -> str:
+    """元画像のパスとサイズ名から決まる保存先"""
+    stem, _ = os.path.splitext(name)
+    ext = "jpg" if image_format() == "jpeg" else "webp"
+    return f"{RENDITION_DIR}/{stem}.{size}.{ext}"
+
+
+def _render(fieldfile, size: str) -> bytes:
+    fmt = image_format()
+    with fieldfile.storage.open(fieldfile.name, "rb") as f:
+        with Image.open(f) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(sizes()[size], Image.LANCZOS)
+            if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+
+            buf = io.BytesIO()
+            img.save(buf, fmt.upper(), quality=getattr(settings, "RENDITION_QUALITY", 80), optimize=True)
+    return buf.getvalue()
+
+
+def generate(fieldfile, size: str, force: bool = False) -> str:
+    """
+    fieldfile の size 版を作って名前を返す。すでにあれば作らない（force で作り直す）。
+    """
+    name = rendition_name(fieldfile.name, size)
+    storage = fieldfile.storage
+    if not force and storage.exists(name):
+        return name
+    save_overwrite(storage, name, _render(fieldfile, size))
+    return name
+
+
+def generate_all(fieldfile, force: bool = False) -> list:
+    """全サイズ分を作る。作れなかったサイズは飛ばす"""
+    if not fieldfile:
+        return []
+    names = []
+    for size in sizes():
+        try:
+            names.append(generate(fieldfile, size, force=force))
+        except Exception:
+            logger.exception("レンディションを作れませんでした: %s (%s)", fieldfile.name, size)
+    return names
+
+
+def generate_later(fieldfiles):
+    """fieldfiles の全サイズ分をバックグラウンドで作る"""
+    for fieldfile in fieldfiles:
+        _executor.submit(generate_all, fieldfile)
+
+
+def rendition_url(fieldfile, size: str) -> str:
+    """
+    size 版の URL。まだ無い（作成中・作れなかった）ときは元画像の URL を返す。
+    ここでは作らない（ファイルシステムのストレージなら stat 1 回だけ）。
+    """
+    if not fieldfile:
+        return ""
+    if size in sizes():
+        name = rendition_name(fieldfile.name, size)
+        if fieldfile.storage.exists(name):
+            return fieldfile.storage.url(name)
+    return fieldfile.url
+
+
+# レンディションを持つモデルと画像フィールド（signals とコマンドで使う）
+def image_fields():
+    from animals.models import Animal
+    from goods.models import Goods, GoodsImage
+
+    return [
+        (Animal, ["pic1", "pic2", "pic3", "pic4", "pic5"]),
+        (Goods, ["image"]),
+        (GoodsImage, ["image"]),
+    ]
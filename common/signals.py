@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from .renditions import generate_later, image_fields
+
+
+# 画像がアップロードされたら縮小版を作っておく（コミット後にバックグラウンドで。作成済みなら何もしない）
+def build_renditions(sender, instance, **kwargs):
+    fields = dict(image_fields())[sender]
+    files = [getattr(instance, name) for name in fields if getattr(instance, name)]
+    if files:
+        transaction.on_commit(lambda: generate_later(files))
+
+
+def connect():
+    for model, _ in image_fields():
+        post_save.connect(build_renditions, sender=model, dispatch_uid=f"renditions_{model._meta.label}")
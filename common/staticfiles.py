@@ -0,0 +1,114 @@
+"""
+静的ファイルの配信まわり。
+
+collectstatic で STATIC_ROOT に集めるとき、CSS を縮め、ファイル名に内容のハッシュを付けて
+staticfiles.json（マニフェスト）を書く。{% static %} はマニフェストを引いてハッシュ付きの
+名前を返すので、中身が変わらない限り URL も変わらず、ブラウザは永久にキャッシュしてよい。
+
+    css/base.css  →  css/base.3f2a9c1d7e4b.css
+"""
+import logging
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.views.static import serve as static_serve
+
+# ハッシュ付きの名前（name.<12桁>.ext）
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------
+# CSS の縮小
+# ----------------------------
+# 文字列・url(...)・コメント・空白。文字列と url(...) は中身に /* や空白があっても触らない
+_CSS_TOKEN = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|\burl\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*)\s*\))"""
+    r"|(/\*.*?\*/)|(\s+)",
+    re.S | re.I,
+)
+# 前後の空白を落としても意味が変わらない記号（: や ( は子孫セレクタ・@media があるので残す）
+_CSS_TIGHT = set("{};,>")
+
+
+def minify_css(css: str) -> str:
+    """
+    コメントと余分な空白を取る。
+    文字列・url(...) の中はそのまま。括弧の中（calc() など）は空白を 1 つに詰めるだけで消さない。
+    """
+    out = []          # [(文字列, 触らない部分か)]
+    space = False
+    depth = 0         # 括弧の深さ
+
+    def emit(piece, opaque):
+        nonlocal space, depth
+        if not piece:
+            return
+        if not opaque and depth == 0:
+            piece = piece.replace(";}", "}")
+            if piece[0] == "}" and out and not out[-1][1] and out[-1][0].endswith(";"):
+                out[-1] = (out[-1][0][:-1], False)
+                if not out[-1][0]:
+                    out.pop()
+        if space and out:
+            if depth > 0 or (out[-1][0][-1] not in _CSS_TIGHT and piece[0] not in _CSS_TIGHT):
+                out.append((" ", False))
+        space = False
+        out.append((piece, opaque))
+        if not opaque:
+            depth = max(depth + piece.count("(") - piece.count(")"), 0)
+
+    pos = 0
+    for m in _CSS_TOKEN.finditer(css):
+        emit(css[pos:m.start()], False)
+        pos = m.end()
+        literal, comment, _ = m.groups()
+        if literal:
+            emit(literal, True)
+        elif comment and comment.startswith("/*!"):
+            # ライセンス表記は残す
+            emit(comment, True)
+        else:
+            space = True
+    emit(css[pos:], False)
+    return "".join(piece for piece, _ in out)
+
+
+class MinifiedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage に CSS の縮小を足したもの。
+    縮めてから保存するので、ハッシュは縮めた後の中身から付く。
+    マニフェストに無い名前は（親クラスのとおり）ValueError になる。collectstatic 漏れや参照の誤りを隠さない。
+    """
+
+    def _save(self, name, content):
+        if name.endswith(".css"):
+            content.seek(0)
+            original = content.read()
+            try:
+                css = original.decode("utf-8") if isinstance(original, bytes) else original
+                content = ContentFile(minify_css(css).encode("utf-8"))
+            except Exception:
+                # 縮められないものは元のまま置く
+                logger.warning("CSS を縮められませんでした（元のまま保存します）: %s", name, exc_info=True)
+                content = ContentFile(original)
+        return super()._save(name, content)
+
+
+# ----------------------------
+# 配信
+# ----------------------------
+def serve(request, path, document_root=None, show_indexes=False):
+    """
+    STATIC_ROOT を Django から配るときのビュー（SERVE_STATIC=True のとき config/urls.py に載る）。
+    ハッシュ付きの名前は中身が変わらないので 1 年・immutable、それ以外は毎回確認させる。
+    前段に nginx などを置く場合はそちらで同じヘッダーを付ける。
+    """
+    response = static_serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code == 200:
+        response["Cache-Control"] = IMMUTABLE if HASHED_NAME.search(path) else "no-cache"
+    return response
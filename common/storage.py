@@ -0,0 +1,20 @@
+"""
+同じ名前で作り直すファイル（画像のレンディション・受領証明書の PDF）の保存。
+"""
+from django.core.files.base import ContentFile
+
+
+def save_overwrite(storage, name: str, data: bytes) -> str:
+    """
+    storage の name に data を上書き保存する。
+    allow_overwrite=True の FileSystemStorage ならそのまま書く。それ以外は消してから保存し、
+    同時に作られて別名（name_xxxx）になったときは重複分を消して name を返す。
+    """
+    if getattr(storage, "allow_overwrite", False):
+        return storage.save(name, ContentFile(data))
+    # 無ければ何もしない（exists を聞いてから消すと、その間に消された場合に失敗する）
+    storage.delete(name)
+    saved = storage.save(name, ContentFile(data))
+    if saved != name:
+        storage.delete(saved)
+    return name
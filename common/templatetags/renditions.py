@@ -0,0 +1,11 @@
+from django import template
+
+from common.renditions import rendition_url
+
+register = template.Library()
+
+
+@register.filter
+def rendition(fieldfile, size="card"):
+    """画像フィールドの縮小版URL（例: {{ a.pic1|rendition:"thumb" }}）。まだ無ければ元画像のURL"""
+    return rendition_url(fieldfile, size)
@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+推し❤（main.views.like）と住所検索（accounts.views.ajax_get_address）は async ビューなので、
+待ち時間の多いこれらを 1 ワーカーで並行にさばくには ASGI サーバーで動かす。例:
+
+    uvicorn config.asgi:application --workers 2
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+WSGI（config/wsgi.py）でもそのまま動くが、その場合はリクエストごとに同期に戻して実行される。
 """
 
 import os
@@ -65,6 +65,9 @@ ROOT_URLCONF = 'config.urls'
 
 AUTH_USER_MODEL = "accounts.Member" 
 
+# ID / メールアドレスのどちらでもログインできる（ModelBackend の役目も兼ねる）
+AUTHENTICATION_BACKENDS = ["accounts.backends.EmailOrUsernameBackend"]
+
 TEMPLATES = [{
     "BACKEND": "django.template.backends.django.DjangoTemplates",
     "DIRS": [BASE_DIR / "templates"],
@@ -105,6 +108,36 @@ DATABASES = {
     }
 }
 
+# キャッシュ（本番は Redis などの共有キャッシュに書き換え）
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# セッション：キャッシュ + DB（accounts.UserSession）。会員ごとに引けるよう user_id を持たせる
+# CACHES が LocMemCache のまま（ワーカー間で共有されない）なら DB だけで読み書きする（accounts/sessions.py）
+SESSION_ENGINE = "accounts.sessions"
+
+# 郵便番号 → 住所（accounts/postal.py）。PostalCode に無い番号だけここに問い合わせる（空なら問い合わせない）
+POSTAL_FALLBACK_URL = os.getenv("POSTAL_FALLBACK_URL", "https://zipcloud.ibsnet.co.jp/api/search")
+POSTAL_FALLBACK_TIMEOUT = float(os.getenv("POSTAL_FALLBACK_TIMEOUT", "2"))
+
+# 発行済みの寄附金受領証明書（PDF）の保存先。個人情報を含むので MEDIA_ROOT の外に置く
+RECEIPT_CACHE_DIR = os.getenv("RECEIPT_CACHE_DIR", BASE_DIR / "receipts")
+
+# 推し❤ の書き込みバッファ
+# "local": プロセス内で保持（web プロセス自身がフラッシュする。1 プロセスで動かすとき用）
+# "cache": 上の CACHES で複数プロセス共有（複数ワーカーではこちら。like の応答の合計値もそろう）
+LIKE_BUFFER_STORE = os.getenv("LIKE_BUFFER_STORE", "local")
+# 定期フラッシュの間隔（秒）。0 なら manage.py flush_likes --interval に任せる（"cache" のときだけ。
+# "local" で 0 にすると ImproperlyConfigured）
+LIKE_BUFFER_FLUSH_INTERVAL = float(os.getenv("LIKE_BUFFER_FLUSH_INTERVAL", "5"))
+
+# ランキングのスナップショットを DB から作り直す間隔（秒）
+RANKING_CACHE_TTL = int(os.getenv("RANKING_CACHE_TTL", "60"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -143,10 +176,36 @@ STATIC_URL = "/static/"
 
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# collectstatic の出力先
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# True: collectstatic で CSS を縮め、ハッシュ付きの名前とマニフェストを作る（common/staticfiles.py）。
+# {% static %} はマニフェストを引くので、本番では collectstatic を済ませてから起動する
+STATIC_MANIFEST = os.getenv("STATIC_MANIFEST", str(not DEBUG)) == "True"
+# True: STATIC_ROOT を Django から配る（ハッシュ付きは Cache-Control: immutable）。
+# 前段の Web サーバーで配る場合は False のまま
+SERVE_STATIC = os.getenv("SERVE_STATIC", "False") == "True"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "common.staticfiles.MinifiedManifestStaticFilesStorage"
+            if STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
 MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# 画像の縮小版（common/renditions.py）。MEDIA_ROOT/renditions/ に置く
+# "webp" / "jpeg"
+RENDITION_FORMAT = os.getenv("RENDITION_FORMAT", "webp")
+RENDITION_QUALITY = int(os.getenv("RENDITION_QUALITY", "80"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,8 +1,12 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from common import staticfiles
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("main.urls")),
@@ -19,4 +23,14 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# collectstatic 済みの STATIC_ROOT を長期キャッシュのヘッダー付きで配る
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")),
+            staticfiles.serve,
+            {"document_root": settings.STATIC_ROOT},
+        ),
+    ]
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+管理画面の一覧まわりの集計。
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from common.cache import cache_is_shared
+
+User = get_user_model()
+
+# 管理者一覧に載せるユーザー（User に is_keeper があるかは起動時に 1 回だけ調べる）
+ADMIN_Q = (
+    Q(is_staff=True) | Q(is_keeper=True)
+    if any(f.name == "is_keeper" for f in User._meta.get_fields())
+    else Q(is_staff=True)
+)
+
+STAFF_COUNTS_KEY = "dashboard:staff_counts"
+STAFF_COUNTS_TTL = 30   # 秒。User が保存・削除されたら dashboard/signals.py で消す
+
+
+def _count_staff() -> dict:
+    return User.objects.filter(ADMIN_Q).aggregate(
+        all=Count("pk"),
+        active=Count("pk", filter=Q(is_active=True)),
+        inactive=Count("pk", filter=Q(is_active=False)),
+    )
+
+
+def staff_counts() -> dict:
+    """
+    管理者一覧のタブの件数（全体・有効・退会）を 1 本の集計クエリで数える。
+    キャッシュするのは共有キャッシュのときだけ（プロセスごとだと signal で消せるのは 1 ワーカー分）
+    """
+    if not cache_is_shared():
+        return _count_staff()
+    return cache.get_or_set(STAFF_COUNTS_KEY, _count_staff, STAFF_COUNTS_TTL)
+
+
+def invalidate_staff_counts():
+    cache.delete(STAFF_COUNTS_KEY)
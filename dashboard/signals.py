@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .service import invalidate_staff_counts
+
+
+# 会員が追加・編集・削除されたら（管理画面・Django admin・退会など経路を問わず）一覧の件数を数え直させる
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def refresh_staff_counts(sender, instance, **kwargs):
+    invalidate_staff_counts()
@@ -44,6 +44,9 @@ urlpatterns = [
     path("animals/<int:pk>/withdraw/", views.animal_withdraw, name="animal_withdraw"),
     path("animals/<int:pk>/reactivate/", views.animal_reactivate, name="animal_reactivate"),
 
+    # 寄付状況（動物園ごとの集計）
+    path("donations/", views.zoo_donations, name="zoo_donations"),
+
     # ダッシュボード本体
     path('', views.admin_dashboard, name='dashboard'),
 ]
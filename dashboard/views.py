@@ -14,9 +14,9 @@ from django.urls import reverse, reverse_lazy
 from django.views.decorators.http import require_POST
 from django.views.generic import ListView, FormView, UpdateView
 
-from django.utils import timezone
-from django.contrib.sessions.models import Session
+from accounts.sessions import revoke_user_sessions
 
+from .service import ADMIN_Q, staff_counts
 from .forms import StaffCreateForm, StaffEditForm, KeeperCreateForm, KeeperEditForm, AnimalForm 
 
 User = get_user_model()
@@ -91,18 +91,22 @@ class StaffListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
         return is_staff_or_keeper(self.request.user)
 
     def _admin_base_q(self):
-        field_names = {f.name for f in User._meta.get_fields()}
-        if "is_keeper" in field_names:
-            return User.objects.filter(Q(is_staff=True) | Q(is_keeper=True))
-        return User.objects.filter(is_staff=True)
+        return User.objects.filter(ADMIN_Q)
+
+    def _search(self) -> str:
+        return (self.request.GET.get("q") or "").strip()
+
+    def _status(self) -> str:
+        status = (self.request.GET.get("status") or "all").strip()
+        return status if status in ("active", "inactive") else "all"
 
     def get_queryset(self):
         base = self._admin_base_q()
-        q = (self.request.GET.get("q") or "").strip()
+        q = self._search()
         if q:
             base = base.filter(Q(username__icontains=q) | Q(email__icontains=q))
 
-        status = (self.request.GET.get("status") or "all").strip()
+        status = self._status()
         if status == "active":
             base = base.filter(is_active=True)
         elif status == "inactive":
@@ -115,18 +119,20 @@ class StaffListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
 
         return base.order_by(order)
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        if not self._search():
+            # 検索していなければ一覧の件数はタブの件数と同じなので COUNT し直さない
+            paginator.count = staff_counts()[self._status()]
+        return paginator
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        base_all = self._admin_base_q()
         ctx.update({
-            "q": (self.request.GET.get("q") or "").strip(),
+            "q": self._search(),
             "order": (self.request.GET.get("order") or "-id").strip(),
-            "status": (self.request.GET.get("status") or "all").strip(),
-            "counts": {
-                "all": base_all.count(),
-                "active": base_all.filter(is_active=True).count(),
-                "inactive": base_all.filter(is_active=False).count(),
-            },
+            "status": self._status(),
+            "counts": staff_counts(),
         })
         return ctx
 
@@ -222,10 +228,7 @@ def withdraw_user(request: HttpRequest, pk: int) -> HttpResponse:
     if target.is_active:
         target.is_active = False
         target.save(update_fields=["is_active"])
-    for s in Session.objects.filter(expire_date__gt=timezone.now()):
-        data = s.get_decoded()
-        if data.get("_auth_user_id") == str(target.pk):
-            s.delete()
+    revoke_user_sessions(target.pk)
     messages.success(request, f"{target.username} を退会処理しました（ログイン不可）。")
     return _redirect_admins()
 
@@ -356,6 +359,7 @@ def withdraw_member(request, pk):
     user = get_object_or_404(User, pk=pk)
     user.is_active = False
     user.save()
+    revoke_user_sessions(user.pk)
     messages.warning(request, f"{user.username} を退会処理しました。")
     return redirect("dashboard:member_list")
 
@@ -373,6 +377,7 @@ def reactivate_member(request, pk):
 
 from animals.models import Animal, Zoo
 from django.core.paginator import Paginator
+from donation import service as donation_service
 
 @staff_or_keeper_required
 def animals_list(request):
@@ -404,6 +409,30 @@ def animals_list(request):
         }
     )
 
+# 寄付状況（動物園ごとの集計）
+@staff_or_keeper_required
+def zoo_donations(request):
+    user = request.user
+    zoos = Zoo.objects.order_by("zoo_id")
+
+    # keeper は所属動物園だけ
+    if getattr(user, "is_keeper", False) and not (user.is_staff or user.is_superuser):
+        zoo_ids = [user.zoo_id] if getattr(user, "zoo_id", None) else []
+        zoos = zoos.filter(zoo_id__in=zoo_ids)
+    else:
+        zoo_ids = None
+        zoo_param = request.GET.get("zoo", "")
+        if zoo_param.isdigit():
+            zoo_ids = [int(zoo_param)]
+
+    report = donation_service.zoo_report(zoo_ids)
+    return render(request, "dashboard/zoo_donations.html", {
+        **report,
+        "zoos": zoos,
+        "selected_zoo": zoo_ids[0] if zoo_ids else None,
+    })
+
+
 # 追加：動物登録
 @staff_or_keeper_required
 def animal_create(request):
@@ -0,0 +1,130 @@
+# coding: utf-8
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+
+def _init_worker():
+    # spawn で起動した子プロセスでも Django を使えるように
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def _build_receipts(donation_ids, force):
+    """寄付 ID のまとまり 1 つ分の証明書を作る（子プロセスで実行）"""
+    from donation.models import Donation
+    from donation.receipts import active_stamps, is_stored, receipt_name, store_receipt
+
+    donations = list(Donation.objects.filter(pk__in=donation_ids).select_related("donor", "zoo"))
+    stamps = active_stamps({d.zoo_id for d in donations})
+    built = 0
+    for donation in donations:
+        stamp = stamps.get(donation.zoo_id)
+        if force or not is_stored(receipt_name(donation.pk, stamp)):
+            store_receipt(donation, stamp)
+            built += 1
+    return built
+
+
+def _build_summaries(donor_ids, year, force):
+    """寄付者のまとまり 1 つ分の年間まとめを作る（子プロセスで実行）"""
+    from accounts.models import Member
+    from donation.models import Donation
+    from donation.receipts import is_stored, store_annual_summary, summary_name
+
+    donations = {}
+    for d in (
+        Donation.objects.filter(donor_id__in=donor_ids, created_at__year=year)
+        .select_related("zoo")
+        .order_by("created_at", "donation_id")
+    ):
+        donations.setdefault(d.donor_id, []).append(d)
+
+    built = 0
+    for donor in Member.objects.filter(pk__in=donor_ids):
+        if force or not is_stored(summary_name(donor.pk, year)):
+            store_annual_summary(donor, year, donations.get(donor.pk, []))
+            built += 1
+    return built
+
+
+def _chunks(ids, size):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"日付は YYYY-MM-DD で指定してください: {value}")
+
+
+class Command(BaseCommand):
+    help = "期間内の寄附金受領証明書と、寄付者ごとの年間まとめを前もって作る（作成済みは飛ばす）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="対象の年（既定は前年）。--from/--to より優先")
+        parser.add_argument("--from", dest="date_from", help="開始日 YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="終了日 YYYY-MM-DD（この日を含む）")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="並列に動かすプロセス数")
+        parser.add_argument("--chunk", type=int, default=200, help="1 プロセスにまとめて渡す件数")
+        parser.add_argument("--force", action="store_true", help="作成済みのものも作り直す")
+        parser.add_argument("--no-summary", action="store_true", help="年間まとめを作らない")
+
+    def handle(self, *args, **options):
+        from donation.models import Donation
+
+        if options["year"] or not (options["date_from"] or options["date_to"]):
+            year = options["year"] or timezone.localdate().year - 1
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start = _parse_date(options["date_from"]) if options["date_from"] else None
+            end = _parse_date(options["date_to"]) if options["date_to"] else timezone.localdate()
+        if start and start > end:
+            raise CommandError("開始日が終了日より後です")
+
+        # 期間は created_at の範囲で比べる（日付は現地時間）
+        qs = Donation.objects.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+        )
+        if start:
+            qs = qs.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+        donation_ids = list(qs.order_by("donation_id").values_list("donation_id", flat=True))
+
+        # 年ごとに、その年に寄付した人の年間まとめを作る
+        summary_targets = {}
+        if not options["no_summary"]:
+            for year in qs.dates("created_at", "year"):
+                summary_targets[year.year] = list(
+                    qs.filter(created_at__year=year.year)
+                    .order_by("donor_id").values_list("donor_id", flat=True).distinct()
+                )
+
+        force, size = options["force"], max(1, options["chunk"])
+        self.stdout.write(
+            f"{start or ''}〜{end}: 寄付 {len(donation_ids)} 件 / 年間まとめ {sum(map(len, summary_targets.values()))} 件"
+        )
+
+        # fork する前に親の DB 接続を閉じる（子に同じ接続を持ち込まない）
+        connections.close_all()
+        receipts = summaries = 0
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"]), initializer=_init_worker) as pool:
+            jobs = [pool.submit(_build_receipts, ids, force) for ids in _chunks(donation_ids, size)]
+            summary_jobs = [
+                pool.submit(_build_summaries, ids, year, force)
+                for year, donor_ids in summary_targets.items()
+                for ids in _chunks(donor_ids, size)
+            ]
+            for job in as_completed(jobs):
+                receipts += job.result()
+            for job in as_completed(summary_jobs):
+                summaries += job.result()
+
+        self.stdout.write(self.style.SUCCESS(f"Built {receipts} receipts, {summaries} annual summaries"))
@@ -0,0 +1,15 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+
+from donation.service import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "動物園ごとの寄付の集計（日別・月別）を donations から作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zoo", type=int, action="append", dest="zoo_ids", help="対象の動物園 ID（複数可。省略時は全園）")
+
+    def handle(self, *args, **options):
+        rebuild_stats(options["zoo_ids"])
+        self.stdout.write(self.style.SUCCESS("Rebuilt donation stats"))
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+
+def fill_zoo_donation_stats(apps, schema_editor):
+    Donation = apps.get_model('donation', 'Donation')
+    tz = timezone.get_current_timezone()
+    for model_name, field, trunc in (
+        ('ZooDonationDaily', 'date', TruncDate('created_at', tzinfo=tz)),
+        ('ZooDonationMonthly', 'month', TruncMonth('created_at', tzinfo=tz)),
+    ):
+        model = apps.get_model('donation', model_name)
+        rows = (
+            Donation.objects.annotate(period=trunc).values('zoo_id', 'period')
+            .annotate(total=Sum('amount'), count=Count('donation_id')).order_by()
+        )
+        model.objects.bulk_create([
+            model(**{
+                'zoo_id': row['zoo_id'],
+                field: row['period'].date() if hasattr(row['period'], 'date') else row['period'],
+                'total_amount': row['total'],
+                'donation_count': row['count'],
+            })
+            for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0006_animal_rank_idx'),
+        ('donation', '0004_donation_zoo_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZooDonationDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('total_amount', models.PositiveBigIntegerField(default=0, verbose_name='寄付金額の合計（円）')),
+                ('donation_count', models.PositiveIntegerField(default=0, verbose_name='寄付件数')),
+            ],
+            options={
+                'verbose_name': '寄付集計（日別）',
+                'verbose_name_plural': '寄付集計（日別）',
+                'db_table': 'zoo_donation_daily',
+            },
+        ),
+        migrations.CreateModel(
+            name='ZooDonationMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='月（1日）')),
+                ('total_amount', models.PositiveBigIntegerField(default=0, verbose_name='寄付金額の合計（円）')),
+                ('donation_count', models.PositiveIntegerField(default=0, verbose_name='寄付件数')),
+            ],
+            options={
+                'verbose_name': '寄付集計（月別）',
+                'verbose_name_plural': '寄付集計（月別）',
+                'db_table': 'zoo_donation_monthly',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['zoo', 'created_at'], name='donations_zoo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', 'created_at'], name='donations_donor_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='zoodonationdaily',
+            name='zoo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='animals.zoo', verbose_name='動物園'),
+        ),
+        migrations.AddField(
+            model_name='zoodonationmonthly',
+            name='zoo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='animals.zoo', verbose_name='動物園'),
+        ),
+        migrations.AddConstraint(
+            model_name='zoodonationdaily',
+            constraint=models.UniqueConstraint(fields=('zoo', 'date'), name='zoo_donation_daily_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='zoodonationmonthly',
+            constraint=models.UniqueConstraint(fields=('zoo', 'month'), name='zoo_donation_monthly_uniq'),
+        ),
+        migrations.RunPython(fill_zoo_donation_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0006_animal_rank_idx'),
+        ('donation', '0005_zoo_donation_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='donation',
+            name='donations_donor_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', '-created_at', '-donation_id', 'zoo', 'amount'], name='donations_donor_history_idx'),
+        ),
+    ]
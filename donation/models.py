@@ -41,6 +41,12 @@ class Donation(models.Model):
         db_table = "donations"
         verbose_name = "寄付"
         verbose_name_plural = "寄付"
+        indexes = [
+            models.Index(fields=["zoo", "created_at"], name="donations_zoo_created_idx"),
+            # 寄付履歴（donation/service.py の history_page）用。絞り込み・並び・カーソルの条件を
+            # 索引で辿り、1 ページ分の行だけ表を読む
+            models.Index(fields=["donor", "-created_at", "-donation_id"], name="donations_donor_history_idx"),
+        ]
 
     def __str__(self):
         return f"{self.donor.username} → {self.zoo.zoo_name}（{self.amount}円）"
@@ -57,4 +63,41 @@ class Stamp(models.Model):
         unique_together = ('zoo', 'is_active')  # 園ごとに「使用中」は1つだけ
 
     def __str__(self):
-        return f"{self.zoo.zoo_name}：{self.name}"
\ No newline at end of file
+        return f"{self.zoo.zoo_name}：{self.name}"
+
+
+# 動物園ごとの寄付の集計（寄付のたびに donation/service.py で加算する）
+class ZooDonationDaily(models.Model):
+    zoo = models.ForeignKey(Zoo, on_delete=models.CASCADE, verbose_name="動物園")
+    date = models.DateField("日付")
+    total_amount = models.PositiveBigIntegerField("寄付金額の合計（円）", default=0)
+    donation_count = models.PositiveIntegerField("寄付件数", default=0)
+
+    class Meta:
+        db_table = "zoo_donation_daily"
+        verbose_name = "寄付集計（日別）"
+        verbose_name_plural = "寄付集計（日別）"
+        constraints = [
+            models.UniqueConstraint(fields=["zoo", "date"], name="zoo_donation_daily_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.zoo_id} {self.date}：{self.total_amount}円（{self.donation_count}件）"
+
+
+class ZooDonationMonthly(models.Model):
+    zoo = models.ForeignKey(Zoo, on_delete=models.CASCADE, verbose_name="動物園")
+    month = models.DateField("月（1日）")
+    total_amount = models.PositiveBigIntegerField("寄付金額の合計（円）", default=0)
+    donation_count = models.PositiveIntegerField("寄付件数", default=0)
+
+    class Meta:
+        db_table = "zoo_donation_monthly"
+        verbose_name = "寄付集計（月別）"
+        verbose_name_plural = "寄付集計（月別）"
+        constraints = [
+            models.UniqueConstraint(fields=["zoo", "month"], name="zoo_donation_monthly_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.zoo_id} {self.month:%Y-%m}：{self.total_amount}円（{self.donation_count}件）"
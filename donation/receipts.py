@@ -0,0 +1,298 @@
+"""
+寄附金受領証明書（PDF）。
+
+- フォントはプロセスごとに 1 回だけ登録する（IPAex の TTF は読み込みが重い）。
+  static/fonts/ipaexg.ttf が無い環境では ReportLab 内蔵の HeiseiKakuGo-W5 を使う。
+- 使用中のハンコは描くたびに DB から引き（園ごとに 1 行）、デコード済みの画像だけを
+  ファイル名ごとにプロセス内に持つ。
+- レイアウトは RECEIPT_TEMPLATE（行の並び）と座標の定数で決まる。
+- 発行済みの証明書は変わらないので、作った PDF を RECEIPT_CACHE_DIR に
+  寄付 ID とハンコごとに保存し、2 回目からはそれを返す（ハンコを差し替えると別の名前になる）。寄付者ごとの年間まとめも同じ場所に置く。
+  年末の発行時期は build_receipts コマンドで前もってまとめて作っておける。
+"""
+import hashlib
+import io
+import os
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from common.storage import save_overwrite
+
+from .models import Stamp
+
+# レイアウトを変えたら上げる（保存済みの PDF を作り直させる）
+RECEIPT_VERSION = 1
+
+
+# ----------------------------
+# フォント
+# ----------------------------
+_font_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def font_name() -> str:
+    """登録済みのフォント名（初回だけ登録する）"""
+    with _font_lock:
+        font_path = os.path.join(settings.BASE_DIR, "static/fonts/ipaexg.ttf")
+        if os.path.exists(font_path):
+            pdfmetrics.registerFont(TTFont("IPAexGothic", font_path))
+            return "IPAexGothic"
+        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
+        return "HeiseiKakuGo-W5"
+
+
+# ----------------------------
+# ハンコ
+# ----------------------------
+@lru_cache(maxsize=64)
+def _stamp_reader(name: str):
+    # ファイル名ごと（差し替えると名前が変わる）にデコード済みの画像を持つ
+    field = Stamp._meta.get_field("image")
+    with field.storage.open(name, "rb") as f:
+        return ImageReader(io.BytesIO(f.read()))
+
+
+def active_stamps(zoo_ids) -> dict:
+    """動物園 id -> 使用中のハンコの (pk, ファイル名)。ハンコの無い園は入らない"""
+    return {
+        zoo_id: (pk, name)
+        for pk, zoo_id, name in Stamp.objects.filter(zoo_id__in=zoo_ids, is_active=True)
+        .values_list("pk", "zoo_id", "image")
+    }
+
+
+def active_stamp(zoo_id: int):
+    """使用中のハンコの (pk, ファイル名)。無ければ None"""
+    return active_stamps([zoo_id]).get(zoo_id)
+
+
+# render_receipt / store_receipt の stamp を省略したとき（使用中のハンコを引く）
+_ACTIVE = object()
+
+
+def stamp_token(stamp) -> str:
+    # 保存する PDF の名前に入れる（ハンコの差し替え・画像の入れ替えで変わる）
+    if not stamp:
+        return "0"
+    pk, name = stamp
+    return f"{pk}-{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+
+
+def stamp_image(stamp):
+    """ハンコ (pk, ファイル名) の画像（ImageReader）。無い・読めなければ None"""
+    if not stamp or not stamp[1]:
+        return None
+    try:
+        return _stamp_reader(stamp[1])
+    except OSError:
+        return None
+
+
+# ----------------------------
+# レイアウト
+# ----------------------------
+def _zoo_address(d):
+    return f"{d.zoo_postcode or ''} {d.zoo_address or ''}"
+
+
+# (ラベル, 値)。上から順に LINE_HEIGHT ずつ下げて描く
+RECEIPT_TEMPLATE = [
+    ("寄付者名：", lambda d: d.donor.name),
+    ("寄付者住所：", lambda d: d.address),
+    ("寄付先動物園：", lambda d: d.zoo.zoo_name),
+    ("動物園住所：", _zoo_address),
+    ("動物園電話番号：", lambda d: d.zoo.zoo_phone),
+    ("寄付金額：", lambda d: f"{d.amount:,}円"),
+    ("寄付日：", lambda d: d.created_at.strftime("%Y年%m月%d日")),
+]
+
+TITLE = "寄附金受領証明書"
+TITLE_Y = 800
+BODY_Y = 730
+LINE_HEIGHT = 25
+LABEL_X = 250   # ラベル位置（右寄せ）
+VALUE_X = 270   # 値の開始位置
+NOTE_GAP = 40   # 備考の前の間隔
+FOOTER_X = 480
+FOOTER_Y_TEXT = 70
+FOOTER_Y_DATE = 50
+STAMP_SIZE = 100
+
+
+def render_receipt(donation, stamp=_ACTIVE) -> bytes:
+    """
+    1 件分の PDF を作る（donation は donor・zoo を select_related しておくと速い）。
+    stamp は active_stamp の結果（省略時は引く。None ならハンコなし）
+    """
+    if stamp is _ACTIVE:
+        stamp = active_stamp(donation.zoo_id)
+    font = font_name()
+    buf = io.BytesIO()
+    p = canvas.Canvas(buf)
+
+    # タイトル
+    p.setFont(font, 16)
+    p.drawCentredString(300, TITLE_Y, TITLE)
+
+    # 内容（中央寄せ）
+    p.setFont(font, 12)
+    y = BODY_Y
+    for label, value in RECEIPT_TEMPLATE:
+        p.drawRightString(LABEL_X, y, label)
+        p.drawString(VALUE_X, y, str(value(donation) or ""))
+        y -= LINE_HEIGHT
+
+    # 備考（左寄せで独立）
+    y -= NOTE_GAP - LINE_HEIGHT
+    p.drawString(50, y, f"備考：{donation.message or '-'}")
+
+    # フッター
+    p.drawRightString(FOOTER_X, FOOTER_Y_TEXT, "動物園支援サイト")
+    p.drawRightString(FOOTER_X, FOOTER_Y_DATE, donation.created_at.strftime("%Y年%m月%d日"))
+
+    # ハンコをフッターの右横に配置
+    image = stamp_image(stamp)
+    if image is not None:
+        p.drawImage(image, FOOTER_X + 10, FOOTER_Y_TEXT - 20, width=STAMP_SIZE, height=STAMP_SIZE, mask="auto")
+
+    p.showPage()
+    p.save()
+    return buf.getvalue()
+
+
+# ----------------------------
+# 年間のまとめ（寄付者ごと）
+# ----------------------------
+SUMMARY_TITLE = "{year}年 寄附金受領明細"
+SUMMARY_ROWS_PER_PAGE = 24
+# 列の x 座標（日付・動物園・金額は右寄せ）
+SUMMARY_DATE_X = 60
+SUMMARY_ZOO_X = 160
+SUMMARY_AMOUNT_X = 520
+
+
+def render_annual_summary(donor, year: int, donations) -> bytes:
+    """寄付者の 1 年分の寄付の一覧と合計（donations は zoo を select_related した created_at 順）"""
+    font = font_name()
+    donations = list(donations)
+    buf = io.BytesIO()
+    p = canvas.Canvas(buf)
+
+    def header():
+        p.setFont(font, 16)
+        p.drawCentredString(300, TITLE_Y, SUMMARY_TITLE.format(year=year))
+        p.setFont(font, 12)
+        p.drawString(SUMMARY_DATE_X, TITLE_Y - 40, f"寄付者名：{donor.name or donor.username}")
+        y = BODY_Y - 20
+        p.drawString(SUMMARY_DATE_X, y, "寄付日")
+        p.drawString(SUMMARY_ZOO_X, y, "寄付先動物園")
+        p.drawRightString(SUMMARY_AMOUNT_X, y, "寄付金額")
+        p.line(SUMMARY_DATE_X, y - 6, SUMMARY_AMOUNT_X, y - 6)
+        return y - LINE_HEIGHT
+
+    y = header()
+    for i, d in enumerate(donations):
+        if i and i % SUMMARY_ROWS_PER_PAGE == 0:
+            p.showPage()
+            y = header()
+        p.drawString(SUMMARY_DATE_X, y, d.created_at.strftime("%Y/%m/%d"))
+        p.drawString(SUMMARY_ZOO_X, y, d.zoo.zoo_name)
+        p.drawRightString(SUMMARY_AMOUNT_X, y, f"{d.amount:,}円")
+        y -= LINE_HEIGHT
+
+    p.line(SUMMARY_DATE_X, y + LINE_HEIGHT - 8, SUMMARY_AMOUNT_X, y + LINE_HEIGHT - 8)
+    p.drawString(SUMMARY_ZOO_X, y, f"合計（{len(donations)}件）")
+    p.drawRightString(SUMMARY_AMOUNT_X, y, f"{sum(d.amount for d in donations):,}円")
+
+    p.drawRightString(FOOTER_X, FOOTER_Y_TEXT, "動物園支援サイト")
+    p.showPage()
+    p.save()
+    return buf.getvalue()
+
+
+# ----------------------------
+# 保存済み PDF
+# ----------------------------
+@lru_cache(maxsize=None)
+def receipt_storage() -> FileSystemStorage:
+    # 個人情報を含むので MEDIA_ROOT（公開）とは別の場所に置く
+    return FileSystemStorage(location=settings.RECEIPT_CACHE_DIR, allow_overwrite=True)
+
+
+def receipt_name(donation_id: int, stamp=None) -> str:
+    return f"v{RECEIPT_VERSION}/donation_receipt_{donation_id}_{stamp_token(stamp)}.pdf"
+
+
+def summary_name(donor_id: int, year: int) -> str:
+    return f"v{RECEIPT_VERSION}/annual/{year}/donor_{donor_id}.pdf"
+
+
+def _store(name: str, data: bytes) -> bytes:
+    save_overwrite(receipt_storage(), name, data)
+    return data
+
+
+def _read(name: str):
+    try:
+        with receipt_storage().open(name, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def is_stored(name: str) -> bool:
+    return receipt_storage().exists(name)
+
+
+def store_receipt(donation, stamp=_ACTIVE) -> bytes:
+    """PDF を作って保存する（あれば上書き）"""
+    if stamp is _ACTIVE:
+        stamp = active_stamp(donation.zoo_id)
+    return _store(receipt_name(donation.pk, stamp), render_receipt(donation, stamp))
+
+
+def get_receipt(donation) -> bytes:
+    """保存済みの PDF を返す。無ければ（ハンコが変わっていれば）作って保存する"""
+    stamp = active_stamp(donation.zoo_id)
+    data = _read(receipt_name(donation.pk, stamp))
+    if data is None:
+        data = store_receipt(donation, stamp)
+    return data
+
+
+def _year_donations(donor, year: int):
+    from .models import Donation
+
+    return (
+        Donation.objects.filter(donor=donor, created_at__year=year)
+        .select_related("zoo")
+        .order_by("created_at", "donation_id")
+    )
+
+
+def store_annual_summary(donor, year: int, donations=None) -> bytes:
+    if donations is None:
+        donations = _year_donations(donor, year)
+    return _store(summary_name(donor.pk, year), render_annual_summary(donor, year, donations))
+
+
+def get_annual_summary(donor, year: int) -> bytes:
+    """保存済みの年間まとめ。無ければ作って保存する（寄付が増えると signals で消える）"""
+    data = _read(summary_name(donor.pk, year))
+    if data is None:
+        data = store_annual_summary(donor, year)
+    return data
+
+
+def invalidate_annual_summary(donor_id: int, year: int):
+    # 無ければ何もしない
+    receipt_storage().delete(summary_name(donor_id, year))
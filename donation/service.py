@@ -0,0 +1,167 @@
+"""
+動物園ごとの寄付の集計。
+
+ZooDonationDaily / ZooDonationMonthly を寄付の作成・削除のたびに F() で加算・減算し、
+ダッシュボードはこの集計行だけを読む（donations 全体を GROUP BY しない）。
+日付は現地時間（TIME_ZONE）で区切る。ずれたときは rebuild_stats で作り直せる。
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Donation, ZooDonationDaily, ZooDonationMonthly
+
+
+def _bump(model, period_field, zoo_id, period, amount, count):
+    lookup = {"zoo_id": zoo_id, period_field: period}
+    changes = {"total_amount": F("total_amount") + amount, "donation_count": F("donation_count") + count}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        # その日（月）の最初の寄付
+        with transaction.atomic():
+            model.objects.create(**lookup, total_amount=max(amount, 0), donation_count=max(count, 0))
+    except IntegrityError:
+        # 同時に作られていたら加算に回す
+        model.objects.filter(**lookup).update(**changes)
+
+
+def _apply(donation, sign: int):
+    day = timezone.localtime(donation.created_at).date()
+    amount, count = sign * donation.amount, sign
+    month = day.replace(day=1)
+    with transaction.atomic():
+        _bump(ZooDonationDaily, "date", donation.zoo_id, day, amount, count)
+        _bump(ZooDonationMonthly, "month", donation.zoo_id, month, amount, count)
+        if sign < 0:
+            # 0 件になった行は残さない（rebuild_stats の結果とそろえる）
+            ZooDonationDaily.objects.filter(zoo_id=donation.zoo_id, date=day, donation_count=0).delete()
+            ZooDonationMonthly.objects.filter(zoo_id=donation.zoo_id, month=month, donation_count=0).delete()
+
+
+def record_donation(donation):
+    """寄付 1 件を集計に足す"""
+    _apply(donation, 1)
+
+
+def unrecord_donation(donation):
+    """寄付 1 件を集計から引く"""
+    _apply(donation, -1)
+
+
+def rebuild_stats(zoo_ids=None):
+    """集計を donations から作り直す（初回の取り込み・修復用。ここだけ GROUP BY する）"""
+    donations = Donation.objects.all()
+    daily = ZooDonationDaily.objects.all()
+    monthly = ZooDonationMonthly.objects.all()
+    if zoo_ids is not None:
+        donations = donations.filter(zoo_id__in=zoo_ids)
+        daily = daily.filter(zoo_id__in=zoo_ids)
+        monthly = monthly.filter(zoo_id__in=zoo_ids)
+
+    tz = timezone.get_current_timezone()
+    with transaction.atomic():
+        daily.delete()
+        monthly.delete()
+        for model, field, trunc in (
+            (ZooDonationDaily, "date", TruncDate("created_at", tzinfo=tz)),
+            (ZooDonationMonthly, "month", TruncMonth("created_at", tzinfo=tz)),
+        ):
+            rows = (
+                donations.annotate(period=trunc).values("zoo_id", "period")
+                .annotate(total=Sum("amount"), count=Count("donation_id")).order_by()
+            )
+            model.objects.bulk_create([
+                model(**{
+                    "zoo_id": row["zoo_id"],
+                    # TruncMonth は datetime を返すので日付にそろえる
+                    field: row["period"].date() if hasattr(row["period"], "date") else row["period"],
+                    "total_amount": row["total"],
+                    "donation_count": row["count"],
+                })
+                for row in rows
+            ], batch_size=1000)
+
+
+# ----------------------------
+# ダッシュボード用
+# ----------------------------
+def zoo_report(zoo_ids, days: int = 30, months: int = 12) -> dict:
+    """
+    動物園ごとの直近 days 日・months か月の集計行と累計。
+    zoo_ids が None なら全園。読むのは集計テーブルだけ。
+    """
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    first_month = today.replace(day=1)
+    for _ in range(months - 1):
+        first_month = (first_month - timedelta(days=1)).replace(day=1)
+
+    daily = ZooDonationDaily.objects.filter(date__gte=first_day)
+    monthly = ZooDonationMonthly.objects.select_related("zoo")
+    if zoo_ids is not None:
+        daily = daily.filter(zoo_id__in=zoo_ids)
+        monthly = monthly.filter(zoo_id__in=zoo_ids)
+
+    # 累計は月別の行を足すだけ（園 × 月の数しかない）
+    totals = list(
+        monthly.values("zoo_id", "zoo__zoo_name")
+        .annotate(total=Sum("total_amount"), count=Sum("donation_count"))
+        .order_by("-total")
+    )
+    return {
+        "totals": totals,
+        "monthly": list(monthly.filter(month__gte=first_month).order_by("-month", "zoo_id")),
+        "daily": list(daily.select_related("zoo").order_by("-date", "zoo_id")),
+        "first_day": first_day,
+        "first_month": first_month,
+    }
+
+
+# ----------------------------
+# 寄付履歴（キーセットページング）
+# ----------------------------
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# 履歴の 1 行に出すものだけ読む（住所などは証明書を作るときに読む）
+HISTORY_FIELDS = ("donation_id", "donor_id", "zoo_id", "amount", "message", "created_at", "zoo__zoo_name")
+
+
+def make_cursor(donation) -> str:
+    """ "created_at（マイクロ秒）_donation_id" """
+    return f"{(donation.created_at - _EPOCH) // _MICROSECOND}_{donation.donation_id}"
+
+
+def parse_cursor(value):
+    """ make_cursor の逆。(created_at, donation_id) に。不正なら None"""
+    try:
+        micros, donation_id = (int(v) for v in (value or "").split("_"))
+        return _EPOCH + micros * _MICROSECOND, donation_id
+    except (ValueError, OverflowError):
+        return None
+
+
+def history_page(donor, before=None, limit: int = 20):
+    """
+    寄付者の寄付を新しい順に limit 件。before（parse_cursor の結果）より古いものから読む。
+    (donations, 次ページのカーソル) を返す。カーソルが None なら最後のページ。
+    OFFSET を使わないので、何ページ目でも donations_donor_history_idx を limit 件分辿るだけ。
+    """
+    donations = Donation.objects.filter(donor=donor).select_related("zoo").only(*HISTORY_FIELDS)
+    if before is not None:
+        created_at, donation_id = before
+        donations = donations.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, donation_id__lt=donation_id)
+        )
+    donations = list(donations.order_by("-created_at", "-donation_id")[:limit + 1])
+    next_cursor = make_cursor(donations[limit - 1]) if len(donations) > limit else None
+    return donations[:limit], next_cursor
+
+
+def history_years(donor):
+    """寄付のある年（新しい順。年間のまとめのリンク用）"""
+    return Donation.objects.filter(donor=donor).dates("created_at", "year", order="DESC")
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Donation
+from .receipts import invalidate_annual_summary
+from .service import record_donation, unrecord_donation
+
+
+# 寄付が増えたら（消えたら）その年の年間まとめを作り直させる
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def refresh_annual_summary(sender, instance, **kwargs):
+    invalidate_annual_summary(instance.donor_id, timezone.localtime(instance.created_at).year)
+
+
+# 動物園ごとの集計（日別・月別）に足し引きする
+@receiver(post_save, sender=Donation)
+def add_to_zoo_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_donation(instance)
+
+
+@receiver(post_delete, sender=Donation)
+def remove_from_zoo_stats(sender, instance, **kwargs):
+    unrecord_donation(instance)
@@ -8,5 +8,7 @@ urlpatterns = [
     path("confirm/", views.donate_confirm, name="donate_confirm"),
     path("complete/<int:donation_id>/", views.donate_complete, name="donate_complete"),
     path("receipt/<int:donation_id>/", views.donation_receipt_pdf, name="donation_receipt_pdf"),
+    path("receipt/annual/<int:year>/", views.donation_annual_summary_pdf, name="donation_annual_summary_pdf"),
     path("history/", views.donation_history, name="donation_history"),  # ←追加
+    path("history/json/", views.donation_history_json, name="donation_history_json"),
 ]
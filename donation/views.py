@@ -79,128 +79,84 @@ def donate_complete(request, donation_id):
 
 
 
-import os
-from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from django.contrib.auth.decorators import login_required
 from .models import Donation
-from django.conf import settings
-
-from .models import Stamp
+from .receipts import get_annual_summary, get_receipt
 
 @login_required
 def donation_receipt_pdf(request, donation_id):
-    donation = get_object_or_404(Donation, pk=donation_id)
+    donation = get_object_or_404(Donation.objects.select_related("donor", "zoo"), pk=donation_id)
 
     # 寄付者本人しか見れないように制限
-    if donation.donor != request.user:
+    if donation.donor_id != request.user.pk:
         return HttpResponse("権限がありません", status=403)
 
-    # PDFレスポンスを作成
-    response = HttpResponse(content_type='application/pdf')
+    # 発行済みの証明書は変わらないので、保存済みの PDF があればそれを返す（donation/receipts.py）
+    response = HttpResponse(get_receipt(donation), content_type='application/pdf')
     response['Content-Disposition'] = f'inline; filename="donation_receipt_{donation_id}.pdf"'
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
 
-    # PDFキャンバス作成
-    p = canvas.Canvas(response)
-
-    # 日本語フォント登録
-    font_path = os.path.join(settings.BASE_DIR, "static/fonts/ipaexg.ttf")
-    pdfmetrics.registerFont(TTFont('IPAexGothic', font_path))
-    p.setFont("IPAexGothic", 16)
-
-    # タイトル
-    p.drawCentredString(300, 800, "寄附金受領証明書")
-
-
-    # -----------------------------
-    # 内容（中央寄せ）
-    # -----------------------------
-    y = 730
-    line_height = 25
-    p.setFont("IPAexGothic", 12)
-
-    label_x = 250   # ラベル位置
-    value_x = 270   # 値の開始位置
-
-    p.drawRightString(label_x, y, "寄付者名：")
-    p.drawString(value_x, y, donation.donor.name)
-
-    y -= line_height
-    p.drawRightString(label_x, y, "寄付者住所：")
-    p.drawString(value_x, y, donation.address)
-
-    y -= line_height
-    p.drawRightString(label_x, y, "寄付先動物園：")
-    p.drawString(value_x, y, donation.zoo.zoo_name)
-
-    y -= line_height
-    # 動物園住所と郵便番号
-    p.drawRightString(label_x, y, "動物園住所：")
-    zoo_address = donation.zoo_address or ""
-    zoo_postcode = donation.zoo_postcode or ""
-    p.drawString(value_x, y, f"{zoo_postcode} {zoo_address}")
-
-    y -= line_height
-    # 電話番号
-    p.drawRightString(label_x, y, "動物園電話番号：")
-    p.drawString(value_x, y, donation.zoo.zoo_phone)
-
-
-    y -= line_height
-    p.drawRightString(label_x, y, "寄付金額：")
-    p.drawString(value_x, y, f"{donation.amount:,}円")
-
-    y -= line_height
-    p.drawRightString(label_x, y, "寄付日：")
-    p.drawString(value_x, y, donation.created_at.strftime("%Y年%m月%d日"))
-
-    # -----------------------------
-    # 備考（左寄せで独立）
-    # -----------------------------
-    y -= 40  # ← 少し間隔を空ける！
-    message = donation.message or "-"
-    p.drawString(50, y, f"備考：{message}")
-
-
-    
-    # フッター
-    footer_x = 480
-    footer_y_text = 70
-    footer_y_date = 50
-
-    p.drawRightString(footer_x, footer_y_text, "動物園支援サイト")
-    p.drawRightString(footer_x, footer_y_date, donation.created_at.strftime("%Y年%m月%d日"))
-
-    # ハンコをフッターの右横に配置
-    stamp = Stamp.objects.filter(zoo=donation.zoo, is_active=True).first()
-    if stamp and stamp.image:
-        # 画像の幅・高さ
-        stamp_width = 100
-        stamp_height = 100
-        # フッター右端に合わせる
-        p.drawImage(stamp.image.path, footer_x + 10, footer_y_text - 20, width=stamp_width, height=stamp_height, mask='auto')
-
-
-    p.showPage()
-    p.save()
 
+# 年間のまとめ（確定申告用）
+@login_required
+def donation_annual_summary_pdf(request, year):
+    if not Donation.objects.filter(donor=request.user, created_at__year=year).exists():
+        return HttpResponse("この年の寄付はありません", status=404)
+
+    # build_receipts コマンドで作っておいたものがあればそれを返す
+    response = HttpResponse(get_annual_summary(request.user, year), content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="donation_summary_{year}.pdf"'
+    response['Cache-Control'] = 'private, no-cache'
     return response
 
 
 
 
 #　寄付履歴ページ
+from django.http import JsonResponse
 from django.shortcuts import render
-from .models import Donation
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from . import service
+
+HISTORY_PER_PAGE = 20
+
+
+def _history_page(request):
+    # ?before=<カーソル> で続きを読む（不正な値なら最初から）
+    before = service.parse_cursor(request.GET.get('before'))
+    donations, next_cursor = service.history_page(request.user, before=before, limit=HISTORY_PER_PAGE)
+    return donations, next_cursor, before is None
+
 
 @login_required
 def donation_history(request):
     # ログインユーザーの寄付履歴
-    donations = Donation.objects.filter(donor=request.user).order_by('-created_at')
+    donations, next_cursor, is_first_page = _history_page(request)
     return render(request, 'donation/donation_history.html', {
-        'donations': donations
-    })
\ No newline at end of file
+        'donations': donations,
+        'next_cursor': next_cursor,
+        'is_first_page': is_first_page,
+        'years': service.history_years(request.user) if is_first_page else [],
+    })
+
+
+# 寄付履歴の続き（無限スクロール用）
+@login_required
+def donation_history_json(request):
+    donations, next_cursor, _ = _history_page(request)
+    return JsonResponse({
+        'donations': [
+            {
+                'id': d.donation_id,
+                'created_at': timezone.localtime(d.created_at).strftime('%Y/%m/%d %H:%M'),
+                'zoo': d.zoo.zoo_name,
+                'amount': d.amount,
+                'message': d.message or '',
+                'receipt_url': reverse('donation:donation_receipt_pdf', args=[d.donation_id]),
+            }
+            for d in donations
+        ],
+        'next_cursor': next_cursor,
+    })
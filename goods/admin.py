@@ -1,10 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Goods
 
 from django.contrib import admin
 from .models import Order, OrderItem
 
-from .models import Goods, GoodsImage, Order, OrderItem, CartItem
+from .models import Goods, GoodsImage, Order, OrderItem, CartItem, OrderStatusLog
+from .service import cancel_orders, ship_orders, OrderError
 
 # --- 詳細画像のインライン登録 ---
 class GoodsImageInline(admin.TabularInline):
@@ -29,12 +30,39 @@ class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
 
+# --- 発送状況の変更履歴 ---
+class OrderStatusLogInline(admin.TabularInline):
+    model = OrderStatusLog
+    extra = 0
+    can_delete = False
+    readonly_fields = ('from_status', 'to_status', 'changed_by', 'changed_at')
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('member', 'created_at', 'total_stanning_points', 'is_confirmed')
+    list_display = ('member', 'created_at', 'total_stanning_points', 'status', 'is_confirmed')
     search_fields = ('member__username',)
-    list_filter = ('is_confirmed', 'created_at')
-    inlines = [OrderItemInline]    
+    list_filter = ('status', 'is_confirmed', 'created_at')
+    inlines = [OrderItemInline, OrderStatusLogInline]
+    actions = ['ship_selected_orders', 'cancel_selected_orders']
+
+    @admin.action(description="選択した注文を発送済みにする")
+    def ship_selected_orders(self, request, queryset):
+        try:
+            shipped = ship_orders(queryset, changed_by=request.user)
+        except OrderError as e:
+            self.message_user(request, str(e), level=messages.ERROR)
+            return
+        self.message_user(request, f"{len(shipped)}件を発送済みにしました（未発送以外の {queryset.count() - len(shipped)}件はそのまま）。")
+
+    @admin.action(description="選択した注文をキャンセル（在庫・スタポを返却）")
+    def cancel_selected_orders(self, request, queryset):
+        try:
+            results = cancel_orders(queryset.values_list('pk', flat=True), changed_by=request.user)
+        except OrderError as e:
+            self.message_user(request, str(e), level=messages.ERROR)
+            return
+        done = sum(1 for ok in results.values() if ok)
+        self.message_user(request, f"{done}件キャンセルしました（未発送以外の {len(results) - done}件はそのまま）。")
 
 
 # --- 買い物かごモデル ---
@@ -1,11 +1,10 @@
 # かご表示
-from goods.models import CartItem
+from goods.service import cart_summary
 
 def cart_total_quantity(request):
     total_quantity = 0
     if request.user.is_authenticated:
-        cart_items = CartItem.objects.filter(member=request.user)
-        total_quantity = sum(item.quantity for item in cart_items)
+        total_quantity = cart_summary(request.user.pk)['total_quantity']
     else:
         # セッションカートなどを使ってる場合はここに処理を追加
         cart = request.session.get('cart', {})
@@ -13,8 +12,9 @@ def cart_total_quantity(request):
     return {'total_quantity': total_quantity}
 
 
-from goods.models import Goods
+from django.utils.functional import SimpleLazyObject
+from goods.service import footer_goods
 
 def all_goods(request):
-    goods_list = Goods.objects.all()
-    return {'goods_list': goods_list}
+    # フッターを描画した時だけ読む（中身はキャッシュ）
+    return {'footer_goods': SimpleLazyObject(footer_goods)}
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_order_summary(apps, schema_editor):
+    Order = apps.get_model('goods', 'Order')
+    for order in Order.objects.prefetch_related('items__goods').iterator(chunk_size=500):
+        items = list(order.items.all())
+        order.item_count = sum(item.quantity for item in items)
+        order.items_summary = "\n".join(f"{item.goods.name} × {item.quantity}" for item in items)
+        order.save(update_fields=['item_count', 'items_summary'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0006_alter_order_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='点数'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_summary',
+            field=models.TextField(blank=True, default='', verbose_name='注文内容'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['member', '-id'], name='goods_order_member_hist_idx'),
+        ),
+        migrations.RunPython(fill_order_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0008_order_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('pending', '未発送'), ('shipped', '発送済み'), ('cancelled', 'キャンセル')], max_length=10, verbose_name='変更前')),
+                ('to_status', models.CharField(choices=[('pending', '未発送'), ('shipped', '発送済み'), ('cancelled', 'キャンセル')], max_length=10, verbose_name='変更後')),
+                ('changed_at', models.DateTimeField(auto_now_add=True, verbose_name='変更日時')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='変更者')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_logs', to='goods.order')),
+            ],
+        ),
+    ]
@@ -51,6 +51,33 @@ class Order(models.Model):
         verbose_name="発送状況"
     )
 
+    # 履歴一覧用の要約（注文確定時に保存。一覧で OrderItem を読まずに済むように）
+    item_count = models.PositiveIntegerField(default=0, verbose_name="点数")
+    items_summary = models.TextField(blank=True, default="", verbose_name="注文内容")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['member', '-id'], name='goods_order_member_hist_idx'),
+            # 管理者の注文一覧（発送状況・期間で絞り込み）
+            models.Index(fields=['status', '-created_at'], name='goods_order_status_date_idx'),
+            models.Index(fields=['-created_at'], name='goods_order_created_idx'),
+        ]
+
+
+
+# --- 発送状況の変更履歴 ---
+class OrderStatusLog(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_logs')
+    from_status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES, verbose_name="変更前")
+    to_status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES, verbose_name="変更後")
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="変更者"
+    )
+    changed_at = models.DateTimeField(auto_now_add=True, verbose_name="変更日時")
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} → {self.to_status}"
+
 
 
 # --- 注文アイテムモデル ---
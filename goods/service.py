@@ -0,0 +1,292 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+from common.cache import cache_is_shared
+from common.renditions import rendition_url
+from money.models import Wallet
+from .models import Goods, CartItem, Order, OrderItem, OrderStatusLog
+
+FOOTER_GOODS_KEY = "goods:footer_feed"
+# プロセスごとのキャッシュでは保存・削除の signal が 1 ワーカー分しか消せないので短くする
+FOOTER_GOODS_LOCAL_TTL = 60
+CART_SUMMARY_KEY = "goods:cart_summary:{}"
+
+
+# ===============================
+# フッターのグッズスクローラー
+# ===============================
+def footer_goods() -> list:
+    """
+    スクローラー用に name と画像URL（縮小版）だけ持ったリスト。
+    グッズが保存・削除されるまでキャッシュを使う（goods/signals.py）。
+    キャッシュがワーカー間で共有されていなければ FOOTER_GOODS_LOCAL_TTL 秒で作り直す。
+    """
+    feed = cache.get(FOOTER_GOODS_KEY)
+    if feed is None:
+        feed = [
+            {"name": goods.name, "image_url": rendition_url(goods.image, "thumb")}
+            for goods in Goods.objects.only("name", "image").order_by("id")
+            if goods.image
+        ]
+        ttl = getattr(settings, "FOOTER_GOODS_CACHE_TTL", 60 * 60)
+        if not cache_is_shared():
+            ttl = min(ttl, FOOTER_GOODS_LOCAL_TTL)
+        cache.set(FOOTER_GOODS_KEY, feed, ttl)
+    return feed
+
+
+def invalidate_footer_goods():
+    cache.delete(FOOTER_GOODS_KEY)
+
+
+# ===============================
+# かごの集計（ヘッダーのバッジ用）
+# ===============================
+def cart_summary(member_id: int) -> dict:
+    """
+    会員のかごの {item_count, total_quantity, total_stanning}。
+    1 本の集計クエリで出す。共有キャッシュのときだけ会員ごとにキャッシュし、かごを変更するビューで消す
+    （プロセスごとのキャッシュだと別のワーカーに古い件数が残るので毎回数える）。
+    """
+    if not cache_is_shared():
+        return _count_cart(member_id)
+    key = CART_SUMMARY_KEY.format(member_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = _count_cart(member_id)
+        cache.set(key, summary, getattr(settings, "CART_SUMMARY_CACHE_TTL", 5 * 60))
+    return summary
+
+
+def _count_cart(member_id: int) -> dict:
+    return CartItem.objects.filter(member_id=member_id).aggregate(
+        item_count=Count("id"),
+        total_quantity=Coalesce(Sum("quantity"), 0),
+        total_stanning=Coalesce(Sum(F("quantity") * F("goods__required_stanning_points")), 0),
+    )
+
+
+def invalidate_cart_summary(member_id: int):
+    cache.delete(CART_SUMMARY_KEY.format(member_id))
+
+
+# ===============================
+# かごの中身（かご・注文確認・交換確定で共通）
+# ===============================
+@dataclass
+class CartSnapshot:
+    """かごの中身と合計。items の goods は読み込み済み、line_stanning は行ごとの必要スタポ"""
+    items: list = field(default_factory=list)
+    total_quantity: int = 0
+    total_stanning: int = 0
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def item_ids(self) -> list:
+        return [item.pk for item in self.items]
+
+
+def load_cart(member) -> CartSnapshot:
+    """かごを goods ごと 1 クエリで読み、行ごとの必要スタポは DB で計算する"""
+    items = list(
+        CartItem.objects.filter(member=member)
+        .select_related("goods")
+        .annotate(line_stanning=F("quantity") * F("goods__required_stanning_points"))
+        .order_by("added_at", "id")
+    )
+    return CartSnapshot(
+        items=items,
+        total_quantity=sum(item.quantity for item in items),
+        total_stanning=sum(item.line_stanning for item in items),
+    )
+
+
+# ===============================
+# 注文確定
+# ===============================
+class OrderError(Exception):
+    """注文・キャンセルできない理由（メッセージはそのまま画面に出す）"""
+
+
+def place_order(member, shipping: dict) -> Order:
+    """
+    かごの中身で注文を確定する。全体を 1 トランザクションで行い、
+    ロックは常に Goods（id 順）→ Wallet の順で取る（同時注文でのデッドロック防止）。
+    在庫とスタポは条件付きの F() 更新で減らすので、マイナスにはならない。
+    shipping は recipient_name / postal_code / address / phone_number。
+    """
+    with transaction.atomic():
+        cart = load_cart(member)
+        if not cart:
+            raise OrderError("かごが空です。")
+
+        quantities = defaultdict(int)
+        for item in cart:
+            quantities[item.goods_id] += item.quantity
+
+        goods = {
+            g.pk: g
+            for g in Goods.objects.select_for_update().filter(pk__in=quantities).order_by("pk")
+        }
+        if len(goods) != len(quantities):
+            raise OrderError("かごに販売終了のグッズが含まれています。")
+        wallet = Wallet.objects.select_for_update().get(member=member)
+
+        # ロック後の値で計算し直す
+        total_stanning = sum(goods[pk].required_stanning_points * q for pk, q in quantities.items())
+        if wallet.stanning_point_balance < total_stanning:
+            raise OrderError("スタポが足りません！")
+
+        for pk in sorted(quantities):
+            updated = Goods.objects.filter(pk=pk, stock__gte=quantities[pk]).update(
+                stock=F("stock") - quantities[pk]
+            )
+            if not updated:
+                raise OrderError(f"{goods[pk].name}の在庫が足りません")
+
+        updated = Wallet.objects.filter(pk=wallet.pk, stanning_point_balance__gte=total_stanning).update(
+            stanning_point_balance=F("stanning_point_balance") - total_stanning
+        )
+        if not updated:
+            raise OrderError("スタポが足りません！")
+
+        order = Order.objects.create(
+            member=member,
+            total_stanning_points=total_stanning,
+            item_count=sum(quantities.values()),
+            items_summary="\n".join(f"{goods[pk].name} × {q}" for pk, q in quantities.items()),
+            **shipping,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, goods_id=pk, quantity=q) for pk, q in quantities.items()
+        ])
+        CartItem.objects.filter(pk__in=cart.item_ids()).delete()
+
+        transaction.on_commit(lambda: invalidate_cart_summary(member.pk))
+
+    return order
+
+
+# ===============================
+# 注文履歴（会員）
+# ===============================
+def order_history_page(member, before=None, limit: int = 20):
+    """
+    会員の注文を新しい順に limit 件。before（注文 id）より古いものから読む。
+    (orders, 次ページのカーソル) を返す。カーソルが None なら最後のページ。
+    中身は Order.items_summary を使うので OrderItem は読まない。
+    """
+    orders = Order.objects.filter(member=member).defer('address')
+    if before is not None:
+        orders = orders.filter(pk__lt=before)
+    orders = list(orders.order_by('-id')[:limit + 1])
+    next_cursor = orders[limit - 1].pk if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+
+# ===============================
+# 注文キャンセル
+# ===============================
+def _log_status(order_ids, from_status: str, to_status: str, changed_by=None):
+    """発送状況の変更履歴をまとめて 1 本の INSERT で残す"""
+    OrderStatusLog.objects.bulk_create([
+        OrderStatusLog(order_id=order_id, from_status=from_status, to_status=to_status, changed_by=changed_by)
+        for order_id in order_ids
+    ])
+
+
+def _cancel(orders, changed_by=None) -> list:
+    """
+    orders（QuerySet）のうち未発送のものをキャンセルし、キャンセルした id を返す。
+    ロック順は place_order と同じく Order → Goods（id 順）→ Wallet（会員 id 順）。
+    """
+    ids = list(
+        orders.select_for_update().filter(status='pending').order_by('pk').values_list('pk', flat=True)
+    )
+    if not ids:
+        return []
+
+    # 状態は条件付きで切り替える（同じ注文を同時にキャンセルしても片方しか通らない）
+    if Order.objects.filter(pk__in=ids, status='pending').update(status='cancelled') != len(ids):
+        raise OrderError("他の操作と重なったため、キャンセルできませんでした。")
+    _log_status(ids, 'pending', 'cancelled', changed_by)
+
+    # 在庫を戻す（グッズごとに 1 本）
+    restock = (
+        OrderItem.objects.filter(order_id__in=ids)
+        .values_list('goods_id')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('goods_id')
+    )
+    for goods_id, quantity in restock:
+        Goods.objects.filter(pk=goods_id).update(stock=F('stock') + quantity)
+
+    # スタポを返す（会員ごとに 1 本）
+    refunds = (
+        Order.objects.filter(pk__in=ids)
+        .values_list('member_id')
+        .annotate(points=Sum('total_stanning_points'))
+        .order_by('member_id')
+    )
+    for member_id, points in refunds:
+        updated = Wallet.objects.filter(member_id=member_id).update(
+            stanning_point_balance=F('stanning_point_balance') + points
+        )
+        if not updated:
+            raise OrderError("ウォレット情報が見つかりませんでした。ポイントの返却に失敗しました。")
+
+    return ids
+
+
+def cancel_order(order_id: int, member=None):
+    """1 件キャンセルする。member を渡すとその会員の注文に限る"""
+    orders = Order.objects.filter(pk=order_id)
+    if member is not None:
+        orders = orders.filter(member=member)
+    with transaction.atomic():
+        if not _cancel(orders, changed_by=member):
+            raise OrderError("発送済みまたはキャンセル済みの注文はキャンセルできません。")
+
+
+def cancel_orders(order_ids, changed_by=None) -> dict:
+    """管理者用の一括キャンセル。{order_id: キャンセルできたか} を返す"""
+    order_ids = list(order_ids)
+    with transaction.atomic():
+        cancelled = set(_cancel(Order.objects.filter(pk__in=order_ids), changed_by))
+    return {order_id: order_id in cancelled for order_id in order_ids}
+
+
+# ===============================
+# 発送状況の変更（管理者）
+# ===============================
+def change_status(orders, from_status: str, to_status: str, changed_by=None) -> list:
+    """
+    orders（QuerySet）のうち from_status のものを to_status にし、変更した id を返す。
+    UPDATE は WHERE status=from_status 付きの 1 本、履歴も bulk_create の 1 本で、
+    件数が増えても行ごとのクエリは出さない。
+    """
+    with transaction.atomic():
+        ids = list(
+            orders.select_for_update().filter(status=from_status).order_by('pk').values_list('pk', flat=True)
+        )
+        if not ids:
+            return []
+        if Order.objects.filter(pk__in=ids, status=from_status).update(status=to_status) != len(ids):
+            raise OrderError("他の操作と重なったため、発送状況を変更できませんでした。")
+        _log_status(ids, from_status, to_status, changed_by)
+    return ids
+
+
+def ship_orders(orders, changed_by=None) -> list:
+    """未発送の注文を発送済みにする（一括発送）"""
+    return change_status(orders, 'pending', 'shipped', changed_by)
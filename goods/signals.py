@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Goods
+from .service import invalidate_footer_goods
+
+
+# グッズが追加・編集・削除されたらフッターのスクローラーを作り直す
+@receiver(post_save, sender=Goods)
+@receiver(post_delete, sender=Goods)
+def refresh_footer_goods(sender, instance, **kwargs):
+    invalidate_footer_goods()
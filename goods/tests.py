@@ -1,3 +1,146 @@
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import Member
+from money.models import Wallet
+from .models import CartItem, Goods, Order
+from .service import OrderError, cancel_order, cancel_orders, place_order, ship_orders
+
+SHIPPING = {
+    "recipient_name": "山田 花子",
+    "postal_code": "1100007",
+    "address": "東京都台東区上野公園",
+    "phone_number": "0300000000",
+}
+
+
+class OrderTestBase(TestCase):
+    def setUp(self):
+        self.member = Member.objects.create_user(username="hanako", password="x", email="hanako@example.com")
+        self.set_points(self.member, 1000)
+        self.pen = Goods.objects.create(
+            name="ペン", description="-", image="goods_images/pen.png", required_stanning_points=100, stock=5,
+        )
+        self.bag = Goods.objects.create(
+            name="バッグ", description="-", image="goods_images/bag.png", required_stanning_points=300, stock=1,
+        )
+
+    def set_points(self, member, points):
+        Wallet.objects.filter(member=member).update(stanning_point_balance=points)
+
+    def points(self, member):
+        return Wallet.objects.get(member=member).stanning_point_balance
+
+    def stock(self, goods):
+        goods.refresh_from_db()
+        return goods.stock
+
+    def add_to_cart(self, member, goods, quantity):
+        CartItem.objects.create(member=member, goods=goods, quantity=quantity)
+
+
+class PlaceOrderTests(OrderTestBase):
+    def test_order_takes_stock_and_points_and_empties_cart(self):
+        self.add_to_cart(self.member, self.pen, 2)
+        self.add_to_cart(self.member, self.bag, 1)
+
+        order = place_order(self.member, SHIPPING)
+
+        self.assertEqual(order.total_stanning_points, 500)
+        self.assertEqual(order.item_count, 3)
+        self.assertEqual(self.stock(self.pen), 3)
+        self.assertEqual(self.stock(self.bag), 0)
+        self.assertEqual(self.points(self.member), 500)
+        self.assertFalse(CartItem.objects.filter(member=self.member).exists())
+
+    def test_insufficient_stock_changes_nothing(self):
+        # ペンは足りるがバッグが足りない → ペンの在庫も戻っている
+        self.add_to_cart(self.member, self.pen, 2)
+        self.add_to_cart(self.member, self.bag, 2)
+
+        with self.assertRaisesMessage(OrderError, "在庫が足りません"):
+            place_order(self.member, SHIPPING)
+
+        self.assertEqual(self.stock(self.pen), 5)
+        self.assertEqual(self.stock(self.bag), 1)
+        self.assertEqual(self.points(self.member), 1000)
+        self.assertEqual(CartItem.objects.filter(member=self.member).count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_insufficient_points_changes_nothing(self):
+        self.set_points(self.member, 150)
+        self.add_to_cart(self.member, self.pen, 2)
+
+        with self.assertRaisesMessage(OrderError, "スタポが足りません"):
+            place_order(self.member, SHIPPING)
+
+        self.assertEqual(self.stock(self.pen), 5)
+        self.assertEqual(self.points(self.member), 150)
+        self.assertEqual(CartItem.objects.filter(member=self.member).count(), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_cart(self):
+        with self.assertRaisesMessage(OrderError, "かごが空です"):
+            place_order(self.member, SHIPPING)
+
+
+class CancelOrderTests(OrderTestBase):
+    def order(self, member, *lines):
+        for goods, quantity in lines:
+            self.add_to_cart(member, goods, quantity)
+        return place_order(member, SHIPPING)
+
+    def test_cancel_restocks_and_refunds(self):
+        order = self.order(self.member, (self.pen, 2))
+
+        cancel_order(order.pk, member=self.member)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "cancelled")
+        self.assertEqual(self.stock(self.pen), 5)
+        self.assertEqual(self.points(self.member), 1000)
+        self.assertEqual(order.status_logs.get().to_status, "cancelled")
+
+    def test_double_cancel_refunds_once(self):
+        order = self.order(self.member, (self.pen, 2))
+        cancel_order(order.pk, member=self.member)
+
+        with self.assertRaises(OrderError):
+            cancel_order(order.pk, member=self.member)
+        self.assertEqual(cancel_orders([order.pk]), {order.pk: False})
+
+        self.assertEqual(self.stock(self.pen), 5)
+        self.assertEqual(self.points(self.member), 1000)
+        self.assertEqual(order.status_logs.count(), 1)
+
+    def test_cannot_cancel_someone_elses_order(self):
+        order = self.order(self.member, (self.pen, 1))
+        other = Member.objects.create_user(username="taro", password="x", email="taro@example.com")
+
+        with self.assertRaises(OrderError):
+            cancel_order(order.pk, member=other)
+        self.assertEqual(self.stock(self.pen), 4)
+
+    def test_bulk_cancel_restocks_each_goods_and_refunds_each_member(self):
+        self.pen.stock = 10
+        self.pen.save()
+        self.bag.stock = 3
+        self.bag.save()
+        other = Member.objects.create_user(username="taro", password="x", email="taro@example.com")
+        self.set_points(other, 1000)
+
+        first = self.order(self.member, (self.pen, 2), (self.bag, 1))    # 500
+        second = self.order(self.member, (self.pen, 3))                  # 300
+        third = self.order(other, (self.pen, 1), (self.bag, 2))          # 700
+        shipped = self.order(other, (self.pen, 1))                       # 100
+        ship_orders(Order.objects.filter(pk=shipped.pk))
+        self.assertEqual(self.stock(self.pen), 3)
+        self.assertEqual(self.stock(self.bag), 0)
+
+        result = cancel_orders([first.pk, second.pk, third.pk, shipped.pk])
+
+        self.assertEqual(result, {first.pk: True, second.pk: True, third.pk: True, shipped.pk: False})
+        # 発送済みの 1 本分だけ減ったまま
+        self.assertEqual(self.stock(self.pen), 9)
+        self.assertEqual(self.stock(self.bag), 3)
+        self.assertEqual(self.points(self.member), 1000)
+        self.assertEqual(self.points(other), 1000 - 100)
@@ -3,10 +3,10 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
-from django.core.paginator import Paginator
 
-from .models import Goods, CartItem, Order, OrderItem
-from money.models import Wallet
+from .models import Goods, CartItem
+from .service import cart_summary, invalidate_cart_summary, load_cart, place_order, OrderError
+from money.service import get_wallet
 
 # ===============================
 # グッズ一覧ページ
@@ -15,19 +15,17 @@ from money.models import Wallet
 def goods_list(request):
     goods_list = Goods.objects.all()
 
-    cart_items = []
     total_quantity = 0
     total_stanning = 0
 
     # 🔽 ログインしている時だけカート情報を取得
     if request.user.is_authenticated:
-        cart_items = CartItem.objects.filter(member=request.user)
-        total_quantity = sum(item.quantity for item in cart_items)
-        total_stanning = sum(item.get_required_stanning_points() for item in cart_items)
+        summary = cart_summary(request.user.pk)
+        total_quantity = summary['total_quantity']
+        total_stanning = summary['total_stanning']
 
     return render(request, 'goods/goods_list.html', {
         'goods_list': goods_list,
-        'cart_items': cart_items,
         'total_quantity': total_quantity,
         'total_stanning': total_stanning,
     })
@@ -48,6 +46,7 @@ def add_to_cart(request, goods_id):
     if not created:
         cart_item.quantity += 1
         cart_item.save()
+    invalidate_cart_summary(request.user.pk)
     return redirect('goods:goods_list')
 
 
@@ -56,6 +55,7 @@ def cart_item_increase(request, item_id):
     item = get_object_or_404(CartItem, id=item_id, member=request.user)
     item.quantity += 1
     item.save()
+    invalidate_cart_summary(request.user.pk)
     return redirect('goods:cart_view')
 
 
@@ -67,6 +67,7 @@ def cart_item_decrease(request, item_id):
         item.save()
     else:
         item.delete()
+    invalidate_cart_summary(request.user.pk)
     return redirect('goods:cart_view')
 
 
@@ -74,16 +75,16 @@ def cart_item_decrease(request, item_id):
 def cart_item_remove(request, item_id):
     item = get_object_or_404(CartItem, id=item_id, member=request.user)
     item.delete()
+    invalidate_cart_summary(request.user.pk)
     return redirect('goods:cart_view')
 
 
 @login_required
 def cart_view(request):
-    cart_items = CartItem.objects.filter(member=request.user)
-    total_stanning = sum(item.get_required_stanning_points() for item in cart_items)
+    cart = load_cart(request.user)
     return render(request, 'goods/cart.html', {
-        'cart_items': cart_items,
-        'total_stanning': total_stanning
+        'cart_items': cart.items,
+        'total_stanning': cart.total_stanning
     })
 
 
@@ -93,19 +94,18 @@ def cart_view(request):
 @login_required
 def checkout(request):  # ← 修正版（重複削除済み）
     member = request.user
-    cart_items = CartItem.objects.filter(member=member)
-    total_stanning = sum(item.get_required_stanning_points() for item in cart_items)
-    wallet = Wallet.objects.get(member=member)
+    cart = load_cart(member)
+    wallet = get_wallet(request, create=True)
 
     # スタポ不足チェック
-    if total_stanning > wallet.stanning_point_balance:
+    if cart.total_stanning > wallet.stanning_point_balance:
         messages.error(request, "スタポが足りません！")
         return redirect('goods:cart_view')
 
     return render(request, 'goods/checkout.html', {
         'member': member,
-        'cart_items': cart_items,
-        'total_stanning': total_stanning,
+        'cart_items': cart.items,
+        'total_stanning': cart.total_stanning,
         'wallet': wallet,
     })
 
@@ -116,24 +116,6 @@ def confirm_exchange(request):
         return redirect('goods:checkout')
 
     member = request.user
-    cart_items = CartItem.objects.filter(member=member)
-    total_stanning = sum(item.get_required_stanning_points() for item in cart_items)
-    wallet = member.wallet
-
-    # スタポ不足
-    if wallet.stanning_point_balance < total_stanning:
-        messages.error(request, "スタポが足りません！")
-        return redirect('goods:cart_view')
-
-    # 在庫チェック
-    for item in cart_items:
-        if item.goods.stock < item.quantity:
-            messages.error(request, f"{item.goods.name}の在庫が足りません")
-            return redirect('goods:cart_view')
-
-    # ウォレット更新
-    wallet.stanning_point_balance -= total_stanning
-    wallet.save()
 
     # 住所情報取得
     address_option = request.POST.get('address_option')
@@ -148,54 +130,29 @@ def confirm_exchange(request):
         address = request.POST.get('new_address')
         phone_number = request.POST.get('new_phone')
 
-    # 注文作成
-    order = Order.objects.create(
-        member=member,
-        total_stanning_points=total_stanning,
-        recipient_name=recipient_name,
-        postal_code=postal_code,
-        address=address,
-        phone_number=phone_number
-    )
-
-    # 注文アイテム登録 & 在庫減少
-    for item in cart_items:
-        OrderItem.objects.create(
-            order=order,
-            goods=item.goods,
-            quantity=item.quantity
-        )
-        item.goods.stock -= item.quantity
-        item.goods.save()
-
-    # カート空にする
-    cart_items.delete()
+    # 注文作成（スタポ・在庫の確保、注文アイテム登録、かごを空にするまで一括）
+    try:
+        order = place_order(member, {
+            'recipient_name': recipient_name,
+            'postal_code': postal_code,
+            'address': address,
+            'phone_number': phone_number,
+        })
+    except OrderError as e:
+        messages.error(request, str(e))
+        return redirect('goods:cart_view')
 
     return render(request, 'goods/exchange_complete.html', {
-        'total_stanning': total_stanning,
+        'total_stanning': order.total_stanning_points,
         'order': order
     })
 
 
 # ===============================
-# 詳細・履歴
+# 詳細
 # ===============================
 @login_required
 def goods_detail(request, goods_id):
     goods = get_object_or_404(Goods, pk=goods_id)
     return render(request, 'goods/goods_detail.html', {'goods': goods})
 
-
-@login_required
-def order_history(request):
-    """ユーザー自身のグッズ交換履歴ページ"""
-    orders = Order.objects.filter(member=request.user).order_by('-created_at')
-    order_items = OrderItem.objects.filter(order__in=orders).select_related('goods', 'order').order_by('-order__created_at')
-
-    paginator = Paginator(order_items, 20)  # 1ページ20件
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    return render(request, 'goods/order_history.html', {
-        'page_obj': page_obj,
-    })
@@ -99,26 +99,113 @@ def goods_admin_delete(request, goods_id):
     return render(request, 'goods/admin_goods_delete_confirm.html', {'goods': goods})
 
 # 注文一覧
+import csv
+from datetime import datetime, time, timedelta
+
 from django.core.paginator import Paginator
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 from .models import Order
+from .service import OrderError, change_status, ship_orders
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value or '', '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _filtered_orders(request):
+    """
+    ?status=pending|shipped|cancelled&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD で絞り込んだ注文。
+    期間は created_at の範囲で比べる（(status, created_at) のインデックスが効くように）。
+    一括発送の POST では同じ条件を hidden で受け取る。
+    """
+    params = request.POST if request.method == 'POST' else request.GET
+    filters = {
+        'status': params.get('status', ''),
+        'date_from': params.get('date_from', ''),
+        'date_to': params.get('date_to', ''),
+    }
+    order_qs = Order.objects.all()
+
+    if filters['status'] in dict(Order.STATUS_CHOICES):
+        order_qs = order_qs.filter(status=filters['status'])
+    else:
+        filters['status'] = ''
+
+    date_from = _parse_date(filters['date_from'])
+    if date_from:
+        order_qs = order_qs.filter(created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    date_to = _parse_date(filters['date_to'])
+    if date_to:
+        order_qs = order_qs.filter(created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+
+    return order_qs.order_by('-created_at', '-id'), filters
+
 
 @staff_member_required
 def admin_order_list(request):
-    # もともとのクエリ
-    order_qs = Order.objects.prefetch_related('items__goods').order_by('-created_at')
+    order_qs, filters = _filtered_orders(request)
+    # グッズは Order.items_summary を表示するので OrderItem は読まない
+    order_qs = order_qs.select_related('member')
 
     # ▼ ページネーション部分を追加
     paginator = Paginator(order_qs, 20)
     page_number = request.GET.get('page')
     pagenated = paginator.get_page(page_number)
 
+    # ページ移動・CSV 出力で絞り込み条件を引き継ぐ
+    query = request.GET.copy()
+    query.pop('page', None)
+
     # pagenated をテンプレートへ渡す
     return render(request, 'goods/admin_order_list.html', {
         'pagenated': pagenated,
+        'filters': filters,
+        'status_choices': Order.STATUS_CHOICES,
+        'query': query.urlencode(),
     })
 
+
+class _Echo:
+    """csv.writer の書き込み先。書いた 1 行をそのまま返す"""
+    def write(self, value):
+        return value
+
+
+@staff_member_required
+def admin_order_export(request):
+    """絞り込んだ注文を CSV で出力（メモリに溜めず chunk ごとに流す）"""
+    order_qs, filters = _filtered_orders(request)
+    rows = order_qs.values_list(
+        'id', 'created_at', 'member__username', 'status', 'item_count', 'items_summary',
+        'total_stanning_points', 'recipient_name', 'postal_code', 'address', 'phone_number',
+    ).iterator(chunk_size=2000)
+    status_labels = dict(Order.STATUS_CHOICES)
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield '\ufeff'  # Excel で文字化けしないよう BOM を付ける
+        yield writer.writerow(['注文ID', '注文日時', '会員', '発送状況', '点数', '注文内容',
+                               '合計スタポ', '名前', '郵便番号', '住所', '電話番号'])
+        for (order_id, created_at, username, status, item_count, items_summary,
+             total, recipient_name, postal_code, address, phone_number) in rows:
+            yield writer.writerow([
+                order_id, timezone.localtime(created_at).strftime('%Y/%m/%d %H:%M'), username,
+                status_labels.get(status, status), item_count, items_summary.replace('\n', ' / '),
+                total, recipient_name, postal_code, address, phone_number,
+            ])
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="orders.csv"'
+    return response
+
 @staff_member_required
 def admin_order_detail(request, order_id):
     order = get_object_or_404(Order.objects.prefetch_related('items__goods'), id=order_id)
@@ -128,27 +215,65 @@ def admin_order_detail(request, order_id):
 @staff_member_required
 def admin_order_ship(request, order_id):
     order = get_object_or_404(Order, id=order_id)
-    order.status = 'shipped'
-    order.save()
+    ship_orders(Order.objects.filter(pk=order.pk), changed_by=request.user)
     return redirect('goods:admin_order_list')
 
 # 発送状態を切り替えるビュー
 @staff_member_required
 def toggle_shipping_status(request, order_id):
-    """発送状態を「未発送⇄発送済み」に切り替える"""
+    """発送状態を「未発送⇄発送済み」に切り替える（status 列だけを条件付きで更新）"""
     order = get_object_or_404(Order, id=order_id)
+    orders = Order.objects.filter(pk=order.pk)
 
     # 状態をトグル（切り替え）
     if order.status == 'pending':
-        order.status = 'shipped'
-        messages.success(request, f"注文ID {order.id} を『発送済み』に変更しました。")
+        changed = change_status(orders, 'pending', 'shipped', request.user)
+        if changed:
+            messages.success(request, f"注文ID {order.id} を『発送済み』に変更しました。")
+    elif order.status == 'shipped':
+        changed = change_status(orders, 'shipped', 'pending', request.user)
+        if changed:
+            messages.info(request, f"注文ID {order.id} を『未発送』に戻しました。")
     else:
-        order.status = 'pending'
-        messages.info(request, f"注文ID {order.id} を『未発送』に戻しました。")
+        changed = []
+    if not changed:
+        messages.warning(request, f"注文ID {order.id} の発送状況は変更できませんでした。")
 
-    order.save()
     return redirect('goods:admin_order_list')
 
+
+# 一括発送
+@staff_member_required
+@require_POST
+def admin_order_bulk_ship(request):
+    """
+    チェックした注文（order_ids）、または all=1 なら今の絞り込み条件に当たる未発送の注文を
+    まとめて発送済みにする。
+    """
+    if request.POST.get('all'):
+        orders, filters = _filtered_orders(request)
+        requested = None
+    else:
+        requested = [int(v) for v in request.POST.getlist('order_ids') if v.isdigit()]
+        orders = Order.objects.filter(pk__in=requested)
+
+    try:
+        shipped = ship_orders(orders, changed_by=request.user)
+    except OrderError as e:
+        messages.error(request, str(e))
+        shipped = []
+
+    if shipped:
+        messages.success(request, f"{len(shipped)}件を発送済みにしました。")
+    skipped = sorted(set(requested or []) - set(shipped))
+    if skipped:
+        messages.warning(request, "未発送ではないため変更しなかった注文ID: " + ", ".join(map(str, skipped)))
+    if not shipped and not skipped:
+        messages.info(request, "発送済みにする注文がありませんでした。")
+
+    query = request.POST.get('query', '')
+    return redirect(f"{reverse('goods:admin_order_list')}?{query}" if query else 'goods:admin_order_list')
+
 # 詳細画像削除
 @user_passes_test(admin_check)
 def delete_detail_image(request, image_id):
@@ -3,15 +3,19 @@ from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
 from django.db import connection
 from goods.models import Goods, GoodsImage, Order, OrderItem, CartItem
+from goods.service import invalidate_cart_summary
 
 # 管理者のみアクセス可能
 @user_passes_test(lambda u: u.is_staff)
 def admin_reset(request):
     if request.method == "POST":
         # --- データ削除 ---
+        cart_members = set(CartItem.objects.values_list('member_id', flat=True))
         OrderItem.objects.all().delete()
         Order.objects.all().delete()
         CartItem.objects.all().delete()
+        for member_id in cart_members:
+            invalidate_cart_summary(member_id)
         GoodsImage.objects.all().delete()
         Goods.objects.all().delete()
 
@@ -2,16 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Order
+from .service import cancel_order as cancel_order_service, order_history_page, OrderError
 
 @login_required
 def order_history(request):
-    """ログイン中会員の注文履歴"""
-    orders = (
-        Order.objects.filter(member=request.user)
-        .prefetch_related('items__goods')
-        .order_by('-created_at')
-    )
-    return render(request, 'goods/order_history.html', {'orders': orders})
+    """ログイン中会員の注文履歴（?before=<注文ID> で続きを表示）"""
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        before = None
+    orders, next_cursor = order_history_page(request.user, before=before)
+    return render(request, 'goods/order_history.html', {
+        'orders': orders,
+        'next_cursor': next_cursor,
+        'is_first_page': before is None,
+    })
 
 
 @login_required
@@ -26,28 +31,13 @@ def cancel_order(request, order_id):
     """注文のキャンセル処理"""
     order = get_object_or_404(Order, id=order_id, member=request.user)
 
-    if order.status == 'pending':
-        # 1️⃣ 在庫を元に戻す
-        for item in order.items.all():
-            item.goods.stock += item.quantity
-            item.goods.save()
-
-        # 2️⃣ スターポイントを返却（Wallet 経由）
-        wallet = getattr(request.user, "wallet", None)
-        if wallet:
-            wallet.stanning_point_balance += order.total_stanning_points
-            wallet.save()
-        else:
-            messages.error(request, "ウォレット情報が見つかりませんでした。ポイントの返却に失敗しました。")
-
-        # 3️⃣ 注文ステータスをキャンセルに変更
-        order.status = 'cancelled'
-        order.save()
-
-        messages.success(request, "注文をキャンセルしました。スターポイントを返却しました。")
-
+    # 在庫の返却・スタポの返却・ステータス変更を 1 トランザクションで
+    try:
+        cancel_order_service(order.pk, member=request.user)
+    except OrderError as e:
+        messages.warning(request, str(e))
     else:
-        messages.warning(request, "発送済みまたはキャンセル済みの注文はキャンセルできません。")
+        messages.success(request, "注文をキャンセルしました。スターポイントを返却しました。")
 
     return redirect('goods:order_history')
 
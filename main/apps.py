@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 class MainConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "main"
\ No newline at end of file
+    name = "main"
+
+    def ready(self):
+        # like バッファの設定の組み合わせがおかしければ起動時に止める
+        from .likes import get_store
+        get_store()
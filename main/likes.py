@@ -0,0 +1,297 @@
+"""
+推し❤ の書き込みバッファ。
+
+like のたびに Animal 行を更新すると人気の動物の行でロック待ちが起きるため、
+いったん animal_id ごとのカウンタに貯めて、フラッシュ時に F() でまとめて
+Animal.total_point へ加算する。
+
+"local" のカウンタはプロセスごとなので、複数ワーカーで動かすと like の応答で返す
+「DB の値 + 未反映分」はそのワーカーの分しか足されない（ワーカーごとに少しずれる）。
+本番で複数ワーカーにするなら "cache" にする。
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from animals.models import Animal
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------
+# カウンタの保存先
+# ----------------------------
+class LocalLikeStore:
+    """プロセス内の辞書で保持（開発・単一プロセス用）"""
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def incr(self, animal_id: int, count: int = 1) -> int:
+        with self._lock:
+            self._counts[animal_id] += count
+            return self._counts[animal_id]
+
+    def get(self, animal_id: int) -> int:
+        with self._lock:
+            return self._counts.get(animal_id, 0)
+
+    def take(self, animal_id: int) -> int:
+        """未反映分を取り出して 0 に戻す"""
+        with self._lock:
+            return self._counts.pop(animal_id, 0)
+
+    def pending_ids(self) -> list[int]:
+        with self._lock:
+            return list(self._counts)
+
+    def drain(self) -> list[int]:
+        """フラッシュする animal_id"""
+        return self.pending_ids()
+
+    @contextmanager
+    def flush_lock(self):
+        # take が辞書ごとロックしているので同時にフラッシュしても二重にはならない
+        yield True
+
+
+class CacheLikeStore:
+    """
+    Django キャッシュ（Redis / Memcached など）で複数プロセス間で共有。
+
+    カウンタが 0 から貯まり始めたとき（と、取り出した後に残りがあるとき）に
+    likes:dirty:<連番> へ animal_id の印を置き、フラッシュは前回の続きの印だけを読む。
+    like の無い動物のカウンタは見に行かない。
+    """
+
+    key_format = "likes:pending:{}"
+    lock_key = "likes:flush_lock"
+    lock_timeout = 60   # 秒。フラッシュ中にプロセスが落ちても残らないように
+    dirty_format = "likes:dirty:{}"
+    dirty_seq_key = "likes:dirty:seq"     # 最後に振った連番
+    dirty_done_key = "likes:dirty:done"   # フラッシュで読み終えた連番
+    dirty_gap_key = "likes:dirty:gap"     # 前回のフラッシュでまだ書かれていなかった連番
+
+    def _key(self, animal_id: int) -> str:
+        return self.key_format.format(animal_id)
+
+    def _mark_dirty(self, animal_id: int):
+        cache.add(self.dirty_seq_key, 0, timeout=None)
+        n = cache.incr(self.dirty_seq_key)
+        cache.set(self.dirty_format.format(n), animal_id, timeout=None)
+
+    def incr(self, animal_id: int, count: int = 1) -> int:
+        key = self._key(animal_id)
+        # フラッシュ中に消えないよう期限なしで置く
+        cache.add(key, 0, timeout=None)
+        pending = cache.incr(key, count)
+        if pending == count:
+            # 0 から貯まり始めた（incr は不可分なので印を置くのは 1 回だけ）
+            self._mark_dirty(animal_id)
+        return pending
+
+    def get(self, animal_id: int) -> int:
+        return cache.get(self._key(animal_id), 0)
+
+    def take(self, animal_id: int) -> int:
+        """
+        読んだ分だけ decr するので、その間に来た like は残る。
+        get と decr の間に別のフラッシュが入らないよう flush_lock の中で呼ぶ。
+        """
+        count = self.get(animal_id)
+        if count > 0 and cache.decr(self._key(animal_id), count) > 0:
+            # get と decr の間に来た like は 0 を通らないので、次のフラッシュ用に印を置き直す
+            self._mark_dirty(animal_id)
+        return count
+
+    def _dirty(self):
+        done = cache.get(self.dirty_done_key, 0)
+        seq = cache.get(self.dirty_seq_key, 0)
+        numbers = range(done + 1, seq + 1)
+        return numbers, cache.get_many([self.dirty_format.format(n) for n in numbers])
+
+    def pending_ids(self) -> list[int]:
+        """未反映の like がある（かもしれない）animal_id。印を読むだけで消さない"""
+        _, found = self._dirty()
+        return list(dict.fromkeys(found.values()))
+
+    def drain(self) -> list[int]:
+        """
+        フラッシュする animal_id を返し、読んだ印を消す（flush_lock の中で呼ぶ）。
+        連番を振ってから印を書くまでの間の番号は次の回に読む。2 回続けて無い番号は
+        書く前に落ちたか追い出されたものとして飛ばし、その回だけ全件のカウンタを見る。
+        """
+        numbers, found = self._dirty()
+        gap = cache.get(self.dirty_gap_key)
+        consumed, upto, sweep = [], numbers.start - 1, False
+        for n in numbers:
+            key = self.dirty_format.format(n)
+            if key in found:
+                consumed.append(key)
+            elif n == gap:
+                sweep = True
+            else:
+                cache.set(self.dirty_gap_key, n, timeout=None)
+                break
+            upto = n
+
+        ids = list(dict.fromkeys(found[key] for key in consumed))
+        if sweep:
+            ids = list(dict.fromkeys(ids + self._scan_all()))
+        cache.delete_many(consumed)
+        cache.set(self.dirty_done_key, upto, timeout=None)
+        return ids
+
+    def _scan_all(self) -> list[int]:
+        ids = list(Animal.objects.values_list("pk", flat=True))
+        found = cache.get_many([self._key(i) for i in ids])
+        return [i for i in ids if found.get(self._key(i), 0) > 0]
+
+    @contextmanager
+    def flush_lock(self):
+        """
+        フラッシュは全プロセスで同時に 1 つだけ（web の各ワーカーのスレッドと
+        flush_likes コマンドが同じカウンタを二重に取り出さないように）。取れなければ False
+        """
+        token = uuid.uuid4().hex
+        acquired = cache.add(self.lock_key, token, timeout=self.lock_timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired and cache.get(self.lock_key) == token:
+                cache.delete(self.lock_key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """settings.LIKE_BUFFER_STORE（"local" / "cache"）に応じた保存先"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            kind = getattr(settings, "LIKE_BUFFER_STORE", "local")
+            if kind == "cache":
+                _store = CacheLikeStore()
+            else:
+                if getattr(settings, "LIKE_BUFFER_FLUSH_INTERVAL", 5) <= 0:
+                    # local のカウンタは web プロセスの中にしかなく、flush_likes コマンドからは見えない
+                    raise ImproperlyConfigured(
+                        "LIKE_BUFFER_STORE='local' では LIKE_BUFFER_FLUSH_INTERVAL を 0 より大きくしてください"
+                        "（flush_likes コマンドに任せるなら LIKE_BUFFER_STORE='cache'）"
+                    )
+                _store = LocalLikeStore()
+        return _store
+
+
+# ----------------------------
+# 加算・参照
+# ----------------------------
+def add_like(animal_id: int, count: int = 1) -> int:
+    """バッファに加算して、その動物の未反映分の合計を返す"""
+    pending = get_store().incr(animal_id, count)
+    _ensure_flusher()
+    return pending
+
+
+def pending_likes(animal_id: int) -> int:
+    return get_store().get(animal_id)
+
+
+def current_total(animal: Animal) -> int:
+    """DB の total_point に未反映分を足した値（"local" で複数ワーカーならこのワーカーの分だけ）"""
+    return animal.total_point + pending_likes(animal.pk)
+
+
+# ----------------------------
+# フラッシュ
+# ----------------------------
+def flush_likes(animal_ids=None) -> int:
+    """
+    貯まっている like を Animal.total_point に反映し、反映した件数を返す。
+    同じ加算値の動物は 1 本の UPDATE にまとめる。
+    """
+    store = get_store()
+    with store.flush_lock() as acquired:
+        if not acquired:
+            # 別のプロセスがフラッシュ中。残りは次の回で反映される
+            return 0
+        if animal_ids is None:
+            animal_ids = store.drain()
+
+        taken = {}
+        for animal_id in animal_ids:
+            count = store.take(animal_id)
+            if count > 0:
+                taken[animal_id] = count
+    if not taken:
+        return 0
+
+    by_count = defaultdict(list)
+    for animal_id, count in taken.items():
+        by_count[count].append(animal_id)
+
+    try:
+        with transaction.atomic():
+            for count, ids in by_count.items():
+                Animal.objects.filter(pk__in=ids).update(total_point=F("total_point") + count)
+    except Exception:
+        # 反映できなかった分はバッファに戻す
+        for animal_id, count in taken.items():
+            store.incr(animal_id, count)
+        raise
+
+    return sum(taken.values())
+
+
+# ----------------------------
+# 定期フラッシュ＆終了時フラッシュ
+# ----------------------------
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            flush_likes()
+        except Exception:
+            logger.exception("like バッファのフラッシュに失敗しました")
+
+
+def _flush_at_exit():
+    try:
+        flush_likes()
+    except Exception:
+        logger.exception("終了時の like フラッシュに失敗しました")
+
+
+def _ensure_flusher():
+    """最初の like で定期フラッシュのスレッドと終了時フックを用意する"""
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is not None:
+            return
+        atexit.register(_flush_at_exit)
+        _flusher = False
+        # 0 以下なら定期フラッシュは flush_likes コマンドに任せる（cache のときだけ。get_store を参照）
+        interval = getattr(settings, "LIKE_BUFFER_FLUSH_INTERVAL", 5)
+        if interval > 0:
+            _flusher = threading.Thread(target=_flush_loop, args=(interval,), daemon=True)
+            _flusher.start()
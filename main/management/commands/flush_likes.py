@@ -0,0 +1,30 @@
+# coding: utf-8
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.likes import CacheLikeStore, flush_likes, get_store
+
+
+class Command(BaseCommand):
+    help = "like バッファを Animal.total_point に反映（--interval 指定で常駐）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="繰り返す間隔（秒）。0 なら 1 回だけ")
+
+    def handle(self, *args, **options):
+        if not isinstance(get_store(), CacheLikeStore):
+            # local のカウンタは web プロセスの中にあり、このプロセスからは常に空に見える
+            raise CommandError("flush_likes は LIKE_BUFFER_STORE=cache のときだけ使えます")
+        interval = options["interval"]
+        try:
+            while True:
+                flushed = flush_likes()
+                self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} likes"))
+                if interval <= 0:
+                    break
+                time.sleep(interval)
+        finally:
+            # Ctrl+C / 停止時も取りこぼさない
+            if interval > 0:
+                flush_likes()
\ No newline at end of file
@@ -1,17 +1,19 @@
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+from django.http import Http404, JsonResponse
 from django.db import transaction
 from animals.models import Animal
 from money.models import Wallet
+from money.service import get_wallet
+from ranking import service as ranking_service
+from .likes import add_like
 
 def index(request):
     animals = Animal.objects.filter(animal_id__lte=100, is_active=True)
 
-    ranking = Animal.objects.filter(is_active=True).order_by('-total_point')[:10]
+    ranking = ranking_service.top(10)
 
-    wallet = None
-    if request.user.is_authenticated:
-        wallet = Wallet.objects.filter(member=request.user).first()
+    wallet = get_wallet(request)
 
     return render(request, "main/index.html", {
         "animals": animals,
@@ -20,37 +22,58 @@ def index(request):
     })
 
 
-@transaction.atomic
-def like(request, pk):
-    if request.method != "POST":
-        return JsonResponse({"error": "invalid request"}, status=400)
+@sync_to_async
+def _spend_cheer_coin(user):
+    """チアコイン 100 → スタポ 1。(wallet, エラーメッセージ)"""
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().filter(member=user).first()
+
+        if wallet is None:
+            return None, "ウォレットがありません。"
+
+        if wallet.cheer_coin_balance < 100:
+            return None, "チアコインが不足しています。"
+
+        wallet.cheer_coin_balance -= 100
+        wallet.stanning_point_balance += 1
+        wallet.save(update_fields=["cheer_coin_balance", "stanning_point_balance"])
+    return wallet, None
 
-    if not request.user.is_authenticated:
-        return JsonResponse({"error": "login required"}, status=403)
 
-    animal = get_object_or_404(Animal, pk=pk)
-    wallet = Wallet.objects.select_for_update().filter(member=request.user).first()
+@sync_to_async
+def _cheer(animal):
+    """(現在の total_point, 上位10の HTML)"""
+    # Animal 行はロックせず、バッファに貯めて後でまとめて反映する
+    total_point = animal.total_point + add_like(animal.pk)
+    ranking_service.bump(animal.pk)
 
-    if wallet is None:
-        return JsonResponse({"error": "ウォレットがありません。"}, status=400)
+    # 上位10の並びが変わった時だけ描画し直す
+    return total_point, ranking_service.top_html(10)
 
-    if wallet.cheer_coin_balance < 100:
-        return JsonResponse({"error": "チアコインが不足しています。"}, status=400)
 
-    wallet.cheer_coin_balance -= 100
-    wallet.stanning_point_balance += 1
-    wallet.save(update_fields=["cheer_coin_balance", "stanning_point_balance"])
+async def like(request, pk):
+    # ロック待ちの間もワーカーをふさがないよう async にして、DB を触る部分だけスレッドで動かす
+    if request.method != "POST":
+        return JsonResponse({"error": "invalid request"}, status=400)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "login required"}, status=403)
+
+    try:
+        animal = await Animal.objects.aget(pk=pk)
+    except Animal.DoesNotExist:
+        raise Http404
 
-    animal.total_point += 1
-    animal.save(update_fields=["total_point"])
+    wallet, error = await _spend_cheer_coin(user)
+    if error:
+        return JsonResponse({"error": error}, status=400)
 
-    from django.template.loader import render_to_string
-    ranking = Animal.objects.order_by('-total_point')[:10]
-    ranking_html = render_to_string("ranking/top.html", {"ranking": ranking}, request=request)
+    total_point, ranking_html = await _cheer(animal)
 
     return JsonResponse({
-        "total_point": animal.total_point,
+        "total_point": total_point,
         "cheer_coin_balance": wallet.cheer_coin_balance,
         "stanning_point_balance": wallet.stanning_point_balance,
         "ranking_html": ranking_html,
-    })
\ No newline at end of file
+    })
@@ -0,0 +1,26 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import Wallet
+
+
+def get_wallet(request, create: bool = False):
+    """
+    ログイン中会員の Wallet。request.user.wallet のキャッシュを使うので、
+    ナビバーの context processor とビューで同じリクエスト内なら 1 回しか読まない。
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.wallet
+    except Wallet.DoesNotExist:
+        if not create:
+            return None
+    wallet, _ = Wallet.objects.get_or_create(member=user)
+    user.wallet = wallet
+    return wallet
+
+
+def lazy_wallet(request):
+    """テンプレートで実際に使われた時だけ読む Wallet"""
+    return SimpleLazyObject(lambda: get_wallet(request))
@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.contrib import messages
 from django.db import transaction
 from .models import Wallet, CheerCoinPurchase 
+from .service import get_wallet
 
 from subscription.models import SubMember
 
@@ -20,9 +21,7 @@ def _find_plan_by_coins(coins: int):
 def charge(request):
 
     # チャージ画面表示（ログアウトでも閲覧可）。
-    wallet = None
-    if request.user.is_authenticated:
-        wallet, _ = Wallet.objects.get_or_create(member=request.user)
+    wallet = get_wallet(request, create=True)
 
     return render(request, "money/charge.html", {
         "wallet": wallet,
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class RankingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "ranking"
\ No newline at end of file
+    name = "ranking"
+
+    def ready(self):
+        import ranking.signals
@@ -0,0 +1,300 @@
+"""
+ランキングのスナップショット。
+
+有効な動物を (total_point DESC, animal_id ASC) で並べた (animal_id, total_point) の列を
+プロセス内に持ち、トップページ・like・ランキングページの 3 か所で共有する。
+like のたびに該当の動物だけを並べ直し、RANKING_CACHE_TTL 秒ごとに DB から作り直す。
+順位は同点を同じ順位にする密な順位（1, 1, 2, ...）で、ポイントの種類の並びから引く。
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from animals.models import Animal
+from main.likes import get_store
+
+
+def _sort_key(row):
+    animal_id, total_point = row
+    return (-total_point, animal_id)
+
+
+def _cursor_key(cursor):
+    # カーソルは (total_point, animal_id) の順
+    total_point, animal_id = cursor
+    return (-total_point, animal_id)
+
+
+class RankingSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None   # [(animal_id, total_point), ...]
+        self._pos = {}      # animal_id -> index
+        self._points = []   # 出てくる total_point の種類（昇順）
+        self._point_counts = {}
+        self._built_at = 0.0
+
+    def _expired(self) -> bool:
+        ttl = getattr(settings, "RANKING_CACHE_TTL", 60)
+        return self._rows is None or time.monotonic() - self._built_at > ttl
+
+    def _rebuild(self):
+        rows = list(
+            Animal.objects.filter(is_active=True)
+            .order_by("-total_point", "animal_id")
+            .values_list("animal_id", "total_point")
+        )
+        # まだ DB に反映されていない like も含める
+        store = get_store()
+        pending = {i: store.get(i) for i in store.pending_ids()}
+        if pending:
+            rows = sorted(((i, p + pending.get(i, 0)) for i, p in rows), key=_sort_key)
+
+        self._rows = rows
+        self._pos = {animal_id: i for i, (animal_id, _) in enumerate(rows)}
+        self._point_counts = {}
+        for _, total_point in rows:
+            self._point_counts[total_point] = self._point_counts.get(total_point, 0) + 1
+        self._points = sorted(self._point_counts)
+        self._built_at = time.monotonic()
+
+    def _ensure(self):
+        if self._expired():
+            self._rebuild()
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure()
+            return len(self._rows)
+
+    def slice(self, start: int, stop: int):
+        """位置 start〜stop の (rows, ranks)"""
+        with self._lock:
+            self._ensure()
+            return self._ranked(self._rows[start:stop])
+
+    def _ranked(self, rows):
+        return rows, [self._dense_rank(total_point) for _, total_point in rows]
+
+    def _dense_rank(self, total_point: int) -> int:
+        # 自分より多いポイントの種類数 + 1
+        return len(self._points) - bisect_left(self._points, total_point)
+
+    def position(self, animal_id: int):
+        """並び順での位置（0 始まり）。休止中などで載っていなければ None"""
+        with self._lock:
+            self._ensure()
+            return self._pos.get(animal_id)
+
+    def rank_of(self, animal_id: int):
+        with self._lock:
+            self._ensure()
+            i = self._pos.get(animal_id)
+            if i is None:
+                return None
+            return self._dense_rank(self._rows[i][1])
+
+    def window(self, center: int, k: int):
+        """位置 center の前後 k 件の (rows, ranks)"""
+        with self._lock:
+            self._ensure()
+            return self._ranked(self._rows[max(0, center - k):center + k + 1])
+
+    def first_position_of_rank(self, rank: int):
+        """順位 rank の先頭の位置。そんな順位がなければ None"""
+        with self._lock:
+            self._ensure()
+            if not 1 <= rank <= len(self._points):
+                return None
+            total_point = self._points[len(self._points) - rank]
+            return bisect_left(self._rows, (-total_point, 0), key=_sort_key)
+
+    def seek(self, after=None, before=None, limit: int = 30, start: int = 0):
+        """
+        カーソル (total_point, animal_id) の次（after）または前（before）の limit 件の (rows, ranks)。
+        並びは (-total_point, animal_id) なので二分探索で位置が決まる。start より前は返さない。
+        """
+        with self._lock:
+            self._ensure()
+            rows = self._rows
+            if after is not None:
+                i = max(start, bisect_right(rows, _cursor_key(after), key=_sort_key))
+                return self._ranked(rows[i:i + limit])
+            if before is not None:
+                j = max(start, bisect_left(rows, _cursor_key(before), key=_sort_key))
+                return self._ranked(rows[max(start, j - limit):j])
+            return self._ranked(rows[start:start + limit])
+
+    def _move_point(self, old: int, new: int):
+        counts = self._point_counts
+        counts[old] -= 1
+        if counts[old] == 0:
+            del counts[old]
+            del self._points[bisect_left(self._points, old)]
+        if new not in counts:
+            counts[new] = 0
+            insort(self._points, new)
+        counts[new] += 1
+
+    def bump(self, animal_id: int, delta: int = 1):
+        """1 頭分のポイントを変え、前後と比べて位置だけずらす"""
+        with self._lock:
+            if self._rows is None or animal_id not in self._pos:
+                return
+            rows, pos = self._rows, self._pos
+            i = pos[animal_id]
+            row = (animal_id, rows[i][1] + delta)
+            self._move_point(rows[i][1], row[1])
+
+            while i > 0 and _sort_key(row) < _sort_key(rows[i - 1]):
+                rows[i] = rows[i - 1]
+                pos[rows[i][0]] = i
+                i -= 1
+            while i < len(rows) - 1 and _sort_key(rows[i + 1]) < _sort_key(row):
+                rows[i] = rows[i + 1]
+                pos[rows[i][0]] = i
+                i += 1
+
+            rows[i] = row
+            pos[animal_id] = i
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+            self._pos = {}
+            self._points = []
+            self._point_counts = {}
+
+
+_snapshot = RankingSnapshot()
+
+
+def _load(rows, ranks) -> list:
+    """
+    (animal_id, total_point) の列を Animal に変換（並び順は rows のまま）。
+    表示する順位はどの画面でも .rank（同点は同順位）を使う
+    """
+    animals = Animal.objects.in_bulk([animal_id for animal_id, _ in rows])
+    result = []
+    for i, (animal_id, total_point) in enumerate(rows):
+        animal = animals.get(animal_id)
+        if animal is None:
+            continue
+        animal.total_point = total_point
+        animal.rank = ranks[i]
+        result.append(animal)
+    return result
+
+
+class RankedAnimals:
+    """
+    start 位以降のランキングを Paginator に渡せるシーケンス。
+    件数はスナップショットから数え、スライスした分だけ Animal を読み込む。
+    """
+
+    def __init__(self, start: int = 0):
+        self.start = start
+
+    def __len__(self):
+        return max(0, _snapshot.count() - self.start)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            begin, end, _ = key.indices(len(self))
+            return _load(*_snapshot.slice(self.start + begin, self.start + end))
+        rows, ranks = _snapshot.slice(self.start + key, self.start + key + 1)
+        if not rows:
+            raise IndexError(key)
+        return _load(rows, ranks)[0]
+
+
+def top(n: int = 10) -> list:
+    """上位 n 頭の Animal"""
+    return _load(*_snapshot.slice(0, n))
+
+
+def top_html(n: int = 10) -> str:
+    """
+    サイドバー（ranking/top.html）の HTML。
+    表示するのは順位と名前だけなので、上位 n 頭の顔ぶれ・並び・順位が変わらない限り
+    キャッシュ済みのものを返す。
+    """
+    rows, ranks = _snapshot.slice(0, n)
+    version = "-".join(f"{animal_id}.{rank}" for (animal_id, _), rank in zip(rows, ranks))
+    key = f"ranking:top_html:{n}:{version}"
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string("ranking/top.html", {"ranking": _load(rows, ranks)})
+        # 名前や画像の変更は TTL で追いつく
+        cache.set(key, html, getattr(settings, "RANKING_CACHE_TTL", 60))
+    return html
+
+
+# ----------------------------
+# 順位の参照
+# ----------------------------
+def rank_of(animal_id: int):
+    """animal_id の順位（同点は同順位）。ランキング外なら None"""
+    return _snapshot.rank_of(animal_id)
+
+
+def position_of(animal_id: int):
+    """animal_id の並び順での位置（0 始まり）。ランキング外なら None"""
+    return _snapshot.position(animal_id)
+
+
+def around(animal_id: int, k: int = 2) -> list:
+    """animal_id の前後 k 頭（本人を含む）。各 Animal に .rank を付ける"""
+    center = _snapshot.position(animal_id)
+    if center is None:
+        return []
+    return _load(*_snapshot.window(center, k))
+
+
+def around_rank(rank: int, k: int = 2) -> list:
+    """順位 rank の先頭の動物とその前後 k 頭。各 Animal に .rank を付ける"""
+    center = _snapshot.first_position_of_rank(rank)
+    if center is None:
+        return []
+    return _load(*_snapshot.window(center, k))
+
+
+# ----------------------------
+# キーセット（シーク）ページング
+# ----------------------------
+def make_cursor(animal) -> str:
+    return f"{animal.total_point}_{animal.animal_id}"
+
+
+def parse_cursor(value):
+    """ "total_point_animal_id" を (total_point, animal_id) に。不正なら None"""
+    try:
+        total_point, animal_id = (int(v) for v in (value or "").split("_"))
+    except ValueError:
+        return None
+    return total_point, animal_id
+
+
+def seek(after=None, before=None, limit: int = 30, start: int = 0) -> list:
+    """
+    カーソル (total_point, animal_id) の次（after）または前（before）の limit 頭。
+    番号付きのページと同じスナップショット（未反映の like を含む）から切り出すので、
+    どちらのリンクから来ても同じ並び・同じポイントになる。
+    """
+    return _load(*_snapshot.seek(after=after, before=before, limit=limit, start=start))
+
+
+def ranked(start: int = 0) -> RankedAnimals:
+    return RankedAnimals(start)
+
+
+def bump(animal_id: int, delta: int = 1):
+    _snapshot.bump(animal_id, delta)
+
+
+def invalidate():
+    _snapshot.invalidate()
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from animals.models import Animal
+from . import service
+
+
+# 管理画面やダッシュボードで動物が追加・編集・削除されたらランキングを作り直す
+# （like の反映は QuerySet.update なのでここは通らない）
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+def invalidate_ranking(sender, instance, **kwargs):
+    service.invalidate()
@@ -1,79 +1,144 @@
+import math
+
 from django.core.paginator import Paginator, EmptyPage
 from django.shortcuts import render
-from animals.models import Animal
+from . import service
 
-def ranking(request):
-    all_animals = Animal.objects.all().order_by('-total_point')
-    other_animals = all_animals[20:]
-    
-    #21位以降に1ページずつに表示される動物の数↓
-    paginator = Paginator(other_animals, 30)
-    total_pages = paginator.num_pages + 1
+TOP_COUNT = 20   # 1ページ目に別枠で表示する数
+PER_PAGE = 30    # 21位以降に1ページずつに表示される動物の数
 
-    page_number_str = request.GET.get('page', '1')
-    try:
-        page_number = int(page_number_str)
-    except ValueError:
-        page_number = 1
 
-    if page_number < 1:
-        page_number = 1
-    elif page_number > total_pages:
-        page_number = total_pages
-
-    context = {
-        'paginator': paginator,
-        'actual_page_num': page_number,
-        'total_pages': total_pages,
-    }
-
-    window = 2 
+def _page_range(page_number, total_pages, window=2):
     page_range = []
 
     if total_pages > 1:
-        
+
         page_range.append(1)
 
         if page_number > 1 + window + 1:
-            page_range.append('...') 
+            page_range.append('...')
 
         start = max(2, page_number - window)
         end = min(total_pages - 1, page_number + window)
-        
+
         for i in range(start, end + 1):
             if i not in page_range:
                 page_range.append(i)
 
         if page_number < total_pages - window - 1:
-            page_range.append('...') 
+            page_range.append('...')
 
         if total_pages not in page_range:
             page_range.append(total_pages)
-    
-    context['page_range'] = page_range
+
+    return page_range
+
+
+def _page_number(request, total_pages):
+    page_number_str = request.GET.get('page', '1')
+    try:
+        page_number = int(page_number_str)
+    except ValueError:
+        page_number = 1
+
+    if page_number < 1:
+        page_number = 1
+    elif page_number > total_pages:
+        page_number = total_pages
+    return page_number
+
+
+def _animal_position(value):
+    try:
+        return service.position_of(int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _cursors(context, animals):
+    # 前後ページへのリンクはカーソル（total_point_animal_id）で渡す
+    animals = list(animals or [])
+    if animals:
+        context['prev_cursor'] = service.make_cursor(animals[0])
+        context['next_cursor'] = service.make_cursor(animals[-1])
+
+
+def _start_rank(animals):
+    # 見出しの「〇位 〜」。カードと同じ順位（同点は同順位）を出す
+    animals = list(animals or [])
+    return animals[0].rank if animals else None
+
+
+def ranking(request):
+    after = service.parse_cursor(request.GET.get('after'))
+    before = service.parse_cursor(request.GET.get('before'))
+    if after or before:
+        return _ranking_keyset(request, after, before)
+
+    # 並び替えはスナップショット側で済んでいる（1〜20位は別枠）
+    other_animals = service.ranked(start=TOP_COUNT)
+
+    paginator = Paginator(other_animals, PER_PAGE)
+    total_pages = paginator.num_pages + 1
+    page_number = _page_number(request, total_pages)
+
+    # ?animal=<id> ならその動物が載っているページを開く
+    position = _animal_position(request.GET.get('animal'))
+    if position is not None:
+        page_number = 1 if position < TOP_COUNT else (position - TOP_COUNT) // PER_PAGE + 2
+
+    context = {
+        'paginator': paginator,
+        'actual_page_num': page_number,
+        'total_pages': total_pages,
+        'page_range': _page_range(page_number, total_pages),
+    }
 
     if page_number == 1:
-        context['animals'] = all_animals[:20]
+        context['animals'] = service.top(TOP_COUNT)
         context['is_page_1'] = True
         try:
             context['page_obj'] = paginator.get_page(1)
         except EmptyPage:
             # 21位以降の動物がいない場合
             context['page_obj'] = None
+        _cursors(context, context['animals'])
     else:
         page_num_for_paginator = page_number - 1
-        
+
         try:
             page_obj = paginator.get_page(page_num_for_paginator)
         except EmptyPage:
-            page_obj = None 
+            page_obj = None
 
         context['page_obj'] = page_obj
         context['is_page_1'] = False
-        
-        if page_obj:
-            context['start_rank'] = 20 + page_obj.start_index()
-        else:
-            context['start_rank'] = 21 
-            
-    return render(request, 'ranking/ranking.html', context)
\ No newline at end of file
+
+        context['start_rank'] = _start_rank(page_obj)
+        _cursors(context, page_obj)
+
+    return render(request, 'ranking/ranking.html', context)
+
+
+def _ranking_keyset(request, after, before):
+    """
+    キーセット（シーク）モード。?after= / ?before= のカーソルから 1 ページ分だけ読む。
+    番号付きのページと同じスナップショットから切り出す（21位以降だけ）。
+    """
+    other_count = len(service.ranked(start=TOP_COUNT))
+    total_pages = max(1, math.ceil(other_count / PER_PAGE)) + 1
+    page_number = max(2, _page_number(request, total_pages))
+
+    animals = service.seek(after=after, before=before, limit=PER_PAGE, start=TOP_COUNT)
+
+    context = {
+        'actual_page_num': page_number,
+        'total_pages': total_pages,
+        'page_range': _page_range(page_number, total_pages),
+        'page_obj': animals,
+        'is_page_1': False,
+        'start_rank': _start_rank(animals),
+    }
+    _cursors(context, animals)
+
+    return render(request, 'ranking/ranking.html', context)